@@ -0,0 +1,187 @@
+// Clientside filtering for dashboard.py (FILTRAGE_CLIENT = True).
+// Mirrors filtrer_donnees, créer_graphiques and the KPI cards on the compact,
+// column-oriented copy stored in 'donnees-compactes'. The keyword is matched
+// against the word index built by indexer_mots rather than the full text.
+window.dash_clientside = Object.assign({}, window.dash_clientside, {
+    filtrage: {
+        mettre_a_jour: function (donnees, plagePrix, boutiques, motCle) {
+            const NB_FIGURES = 7;
+
+            const style = function (titre, extra) {
+                return Object.assign({
+                    title: {text: titre, font: {size: 16, color: '#2E3F4F'}},
+                    plot_bgcolor: 'rgba(0,0,0,0)',
+                    paper_bgcolor: 'rgba(0,0,0,0)',
+                    font: {family: 'Arial, sans-serif', color: '#333333'},
+                    margin: {l: 20, r: 20, t: 60, b: 20},
+                    hoverlabel: {bgcolor: 'white', font: {size: 12, family: 'Arial'}}
+                }, extra || {});
+            };
+            const vide = function () {
+                return {data: [], layout: style('No Data Available')};
+            };
+
+            if (!donnees || !donnees.price || donnees.price.length === 0) {
+                return Array(NB_FIGURES).fill(0).map(vide).concat(['0', 'N/A', 'N/A', '0']);
+            }
+
+            const label = function (colonne, i) {
+                if (!colonne) {
+                    return null;
+                }
+                const code = colonne.codes[i];
+                return code < 0 ? null : colonne.labels[code];
+            };
+
+            // Rows of one indexed word, from encoder_lignes: a base64 bitmap or gaps between positions
+            const decoderLignes = function (code) {
+                const positions = [];
+                if (typeof code === 'string') {
+                    const octets = atob(code);
+                    for (let k = 0; k < octets.length; k++) {
+                        const octet = octets.charCodeAt(k);
+                        for (let bit = 0; bit < 8; bit++) {
+                            if (octet & (1 << bit)) {
+                                positions.push(k * 8 + bit);
+                            }
+                        }
+                    }
+                    return positions;
+                }
+                let position = 0;
+                code.forEach(ecart => positions.push(position += ecart));
+                return positions;
+            };
+
+            // Rows containing every word of the keyword, each as part of an indexed word
+            const rechercher = function (cle) {
+                let retenues = null;
+                cle.toLowerCase().split(/[^\p{L}\p{N}]+/u).filter(Boolean).forEach(fragment => {
+                    const trouvees = new Set();
+                    donnees.mots.forEach((mot, k) => {
+                        if (mot.indexOf(fragment) !== -1) {
+                            decoderLignes(donnees.lignes_mots[k]).forEach(i => trouvees.add(i));
+                        }
+                    });
+                    retenues = retenues ? new Set([...retenues].filter(i => trouvees.has(i))) : trouvees;
+                });
+                return retenues;
+            };
+
+            // Filters, same semantics as filtrer_donnees (the keyword is matched word by word)
+            const min = plagePrix ? plagePrix[0] : -Infinity;
+            const max = plagePrix ? plagePrix[1] : Infinity;
+            const choisies = boutiques && boutiques.length ? new Set(boutiques) : null;
+            const retenues = motCle ? rechercher(motCle) : null;
+
+            const lignes = [];
+            for (let i = 0; i < donnees.price.length; i++) {
+                const prix = donnees.price[i];
+                if (prix < min || prix > max) {
+                    continue;
+                }
+                if (choisies && !choisies.has(label(donnees.shop, i))) {
+                    continue;
+                }
+                if (retenues && !retenues.has(i)) {
+                    continue;
+                }
+                lignes.push(i);
+            }
+
+            if (lignes.length === 0) {
+                return Array(NB_FIGURES).fill(0).map(vide).concat(['0', 'N/A', 'N/A', '0']);
+            }
+
+            const prix = lignes.map(i => donnees.price[i]);
+            const shops = lignes.map(i => label(donnees.shop, i));
+            const systemes = lignes.map(i => label(donnees.os, i));
+            const marques = lignes.map(i => label(donnees.processor_brand, i));
+
+            const compter = function (valeurs) {
+                const comptes = new Map();
+                valeurs.forEach(v => {
+                    if (v !== null) {
+                        comptes.set(v, (comptes.get(v) || 0) + 1);
+                    }
+                });
+                return Array.from(comptes.entries()).sort((a, b) => b[1] - a[1]);
+            };
+
+            const comptesBoutiques = compter(shops);
+            const comptesMarques = compter(marques);
+
+            const sommes = new Map();
+            systemes.forEach((os, k) => {
+                if (os !== null) {
+                    const courant = sommes.get(os) || [0, 0];
+                    sommes.set(os, [courant[0] + prix[k], courant[1] + 1]);
+                }
+            });
+            const prixOs = Array.from(sommes.entries())
+                .map(([os, [somme, n]]) => [os, somme / n])
+                .sort((a, b) => b[1] - a[1]);
+
+            const figures = [
+                {
+                    data: [{type: 'histogram', x: prix, nbinsx: 30, marker: {color: '#4E79A7'}}],
+                    layout: style('Distribution des prix', {
+                        xaxis: {title: {text: 'Prix (TND)'}}, yaxis: {title: {text: "Nombre d'annonces"}}
+                    })
+                },
+                {
+                    data: [{
+                        type: 'bar', x: comptesBoutiques.map(c => c[0]), y: comptesBoutiques.map(c => c[1]),
+                        marker: {color: '#F28E2B'}
+                    }],
+                    layout: style("Nombre d'annonces par boutique", {
+                        xaxis: {title: {text: 'Boutique'}}, yaxis: {title: {text: "Nombre d'annonces"}}
+                    })
+                },
+                {
+                    data: [{
+                        type: 'pie', labels: comptesBoutiques.map(c => c[0]), values: comptesBoutiques.map(c => c[1]),
+                        hole: 0.3
+                    }],
+                    layout: style('Répartition par boutique')
+                },
+                {
+                    data: [{type: 'scatter', mode: 'markers', x: shops, y: prix, marker: {color: '#E15759'}}],
+                    layout: style('Distribution des prix par boutique', {
+                        xaxis: {title: {text: 'Boutique'}}, yaxis: {title: {text: 'Prix (TND)'}}
+                    })
+                },
+                {
+                    data: [{type: 'bar', x: prixOs.map(p => p[0]), y: prixOs.map(p => p[1]), marker: {color: '#76B7B2'}}],
+                    layout: style("Prix moyen par système d'exploitation", {
+                        xaxis: {title: {text: 'Système'}}, yaxis: {title: {text: 'Prix moyen (TND)'}}
+                    })
+                },
+                {
+                    data: [{
+                        type: 'pie', labels: comptesMarques.map(c => c[0]), values: comptesMarques.map(c => c[1]),
+                        hole: 0.4
+                    }],
+                    layout: style('Répartition des marques de processeurs')
+                },
+                {
+                    data: [{type: 'box', x: systemes, y: prix, marker: {color: '#FF9DA7'}}],
+                    layout: style("Distribution des prix par système d'exploitation", {
+                        xaxis: {title: {text: 'Système'}}, yaxis: {title: {text: 'Prix (TND)'}}
+                    })
+                }
+            ];
+
+            const format = v => Math.round(v).toLocaleString('en-US');
+            const somme = prix.reduce((a, b) => a + b, 0);
+            const kpis = [
+                lignes.length.toLocaleString('en-US'),
+                format(somme / prix.length) + ' TND',
+                format(prix.reduce((a, b) => Math.max(a, b), -Infinity)) + ' TND',
+                new Set(shops.filter(s => s !== null)).size.toLocaleString('en-US')
+            ];
+
+            return figures.concat(kpis);
+        }
+    }
+});
@@ -0,0 +1,165 @@
+import argparse
+import json
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+import psycopg2
+from psycopg2.extras import execute_values
+from config import DB_CONFIG, BACKFILL_BATCH_SIZE, BACKFILL_CHECKPOINT, EXTRACT_WORKERS
+from database import NORMALIZED_COLUMNS, PRICE_COLUMNS, EXTRACTION_VERSION
+from extractor import process_single_product
+from normalizer import normalize_characteristics, parse_price
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# products column -> extract_characteristics key
+CHARACTERISTIC_COLUMNS = {
+    "type": "type",
+    "model": "model",
+    "processor_brand": "processor brand",
+    "processor": "processor",
+    "ram": "ram",
+    "gpu": "gpu",
+    "screen": "screen",
+    "color": "color",
+    "os": "os",
+    "storage": "storage"
+}
+
+COLUMN_TYPES = {**{column: "TEXT" for column in CHARACTERISTIC_COLUMNS}, **NORMALIZED_COLUMNS, **PRICE_COLUMNS}
+COLUMNS = list(COLUMN_TYPES)
+
+def _reextract(rows):
+    """Re-run extraction and normalization for (id, description, price) rows (runs in a worker process)."""
+    results = []
+    for product_id, description, price in rows:
+        characteristics = process_single_product(description)
+        normalized = normalize_characteristics(characteristics, description)
+        values = [characteristics.get(key) for key in CHARACTERISTIC_COLUMNS.values()]
+        values += [normalized[column] for column in NORMALIZED_COLUMNS]
+        values.append(parse_price(price))
+        results.append((product_id, *values))
+    return results
+
+def load_checkpoint(path):
+    """Return the last processed id, if the checkpoint belongs to the current extraction version."""
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as file:
+        checkpoint = json.load(file)
+    if checkpoint.get("version") != EXTRACTION_VERSION:
+        logger.info("Checkpoint is for another extraction version; starting over")
+        return None
+    return checkpoint.get("last_id")
+
+def save_checkpoint(path, last_id):
+    """Write the checkpoint atomically so an interrupted run never leaves it half-written."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as file:
+        json.dump({"version": EXTRACTION_VERSION, "last_id": last_id}, file)
+    os.replace(tmp_path, path)
+
+def fetch_batch(cursor, after_id, batch_size):
+    """Next keyset batch of rows whose extraction version is not current."""
+    cursor.execute(
+        f"""
+        SELECT id, description, price, {", ".join(COLUMNS)}
+        FROM products
+        WHERE id > %s AND extraction_version IS DISTINCT FROM %s
+        ORDER BY id
+        LIMIT %s
+        """,
+        (after_id or "", EXTRACTION_VERSION, batch_size)
+    )
+    return cursor.fetchall()
+
+def write_batch(cursor, changed, unchanged_ids):
+    """Apply re-extracted values with one batched UPDATE, and bump the version on unchanged rows."""
+    if changed:
+        assignments = ", ".join(f"{column} = v.{column}" for column in COLUMNS)
+        template = "(" + ", ".join(["%s"] + [f"%s::{COLUMN_TYPES[column]}" for column in COLUMNS] + ["%s"]) + ")"
+        execute_values(
+            cursor,
+            f"""
+            UPDATE products AS p
+            SET {assignments}, extraction_version = v.extraction_version, updated_at = now()
+            FROM (VALUES %s) AS v(id, {", ".join(COLUMNS)}, extraction_version)
+            WHERE p.id = v.id
+            """,
+            [(*row, EXTRACTION_VERSION) for row in changed],
+            template=template,
+            page_size=len(changed)
+        )
+    if unchanged_ids:
+        cursor.execute(
+            "UPDATE products SET extraction_version = %s WHERE id = ANY(%s)",
+            (EXTRACTION_VERSION, unchanged_ids)
+        )
+
+def backfill(batch_size=BACKFILL_BATCH_SIZE, workers=EXTRACT_WORKERS, checkpoint=BACKFILL_CHECKPOINT, restart=False):
+    """Re-extract characteristics for every row not yet at EXTRACTION_VERSION."""
+    workers = workers or os.cpu_count() or 1
+    after_id = None if restart else load_checkpoint(checkpoint)
+    if after_id:
+        logger.info(f"Resuming backfill after id {after_id}")
+
+    conn = psycopg2.connect(**DB_CONFIG)
+    cursor = conn.cursor()
+    total = updated = 0
+
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            while True:
+                rows = fetch_batch(cursor, after_id, batch_size)
+                if not rows:
+                    break
+
+                current = {row[0]: tuple(row[3:]) for row in rows}
+                slice_size = -(-len(rows) // workers)
+                slices = [[row[:3] for row in rows[i:i + slice_size]] for i in range(0, len(rows), slice_size)]
+
+                changed, unchanged_ids = [], []
+                for results in pool.map(_reextract, slices):
+                    for result in results:
+                        if _differs(result[1:], current[result[0]]):
+                            changed.append(result)
+                        else:
+                            unchanged_ids.append(result[0])
+
+                write_batch(cursor, changed, unchanged_ids)
+                conn.commit()
+
+                after_id = rows[-1][0]
+                save_checkpoint(checkpoint, after_id)
+                total += len(rows)
+                updated += len(changed)
+                logger.info(f"Backfilled {total} rows ({updated} changed), last id {after_id}")
+    finally:
+        cursor.close()
+        conn.close()
+
+    # Finished: the next run must scan from the first id again, since rows below
+    # the last id can fall behind the current version after this run
+    if os.path.exists(checkpoint):
+        os.remove(checkpoint)
+    logger.info(f"Backfill complete: {total} rows checked, {updated} updated to version {EXTRACTION_VERSION}")
+    return total, updated
+
+def _differs(new_values, old_values):
+    for new, old in zip(new_values, old_values):
+        if isinstance(new, float) and old is not None:
+            if abs(new - float(old)) > 1e-3:  # REAL columns round-trip through float4
+                return True
+        elif new != old:
+            return True
+    return False
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Re-extract characteristics for rows already in products.")
+    parser.add_argument("--batch-size", type=int, default=BACKFILL_BATCH_SIZE)
+    parser.add_argument("--workers", type=int, default=EXTRACT_WORKERS)
+    parser.add_argument("--checkpoint", default=BACKFILL_CHECKPOINT)
+    parser.add_argument("--restart", action="store_true", help="Ignore the checkpoint and scan from the first id")
+    args = parser.parse_args()
+    backfill(args.batch_size, args.workers, args.checkpoint, args.restart)
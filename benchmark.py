@@ -0,0 +1,188 @@
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+import tracemalloc
+from extractor import extract_characteristics, ExtractionCache, PATTERNS_VERSION
+
+DATA_FILE = "data-final.csv"
+BASELINE_FILE = "benchmark_baseline.json"
+
+# extract_characteristics key -> labeled column in data-final.csv
+LABEL_COLUMNS = {
+    "type": "type",
+    "model": "model",
+    "processor brand": "processor_brand",
+    "processor": "processor",
+    "ram": "ram",
+    "gpu": "gpu",
+    "screen": "screen",
+    "color": "color",
+    "os": "os",
+    "storage": "storage"
+}
+
+def _baseline_engine():
+    return extract_characteristics
+
+def _cached_engine():
+    # Fresh, memory-only cache per run so results do not depend on earlier runs
+    return ExtractionCache(path=None).get
+
+# Engines to compare; each factory returns a callable text -> characteristics
+ENGINES = {
+    "baseline": _baseline_engine,
+    "cached": _cached_engine
+}
+
+def load_labeled_rows(filename=DATA_FILE):
+    """Read (description, labels) pairs from the labeled export."""
+    rows = []
+    with open(filename, newline="", encoding="utf-8") as file:
+        for row in csv.DictReader(file):
+            labels = {key: _clean_label(row.get(column)) for key, column in LABEL_COLUMNS.items()}
+            rows.append((row["description"], labels))
+    return rows
+
+def _clean_label(value):
+    if value is None or value.strip() in ("", "NULL", "N/A"):
+        return None
+    return value.strip()
+
+def synthetic_corpus(rows, size, unique_ratio=0.5):
+    """Scale the labeled rows up to `size` rows.
+
+    Rows are cycled in order; a `unique_ratio` share of them gets a reference
+    prefix so that the text is new (defeating memoization) while every pattern
+    still sees the same content, keeping the labels valid.
+    """
+    if not rows:
+        return []
+    step = int(1 / unique_ratio) if unique_ratio > 0 else 0
+    corpus = []
+    for i in range(size):
+        text, labels = rows[i % len(rows)]
+        if step and i % step == 0 and i >= len(rows):
+            text = f"Réf {i:08d} - {text}"
+        corpus.append((text, labels))
+    return corpus
+
+def _same(value, label):
+    if value is None or label is None:
+        return value is None and label is None
+    return " ".join(value.split()).lower() == " ".join(label.split()).lower()
+
+def run_engine(name, corpus, measure_memory=True, repeat=3):
+    """Time one engine over the corpus (best of `repeat` runs) and score it against the labels."""
+    matches = {key: 0 for key in LABEL_COLUMNS}
+
+    elapsed = None
+    for _ in range(max(repeat, 1)):
+        engine = ENGINES[name]()
+        start = time.perf_counter()
+        results = [engine(text) for text, _ in corpus]
+        run_time = time.perf_counter() - start
+        elapsed = run_time if elapsed is None else min(elapsed, run_time)
+
+    for result, (_, labels) in zip(results, corpus):
+        for key in LABEL_COLUMNS:
+            if _same(result.get(key), labels[key]):
+                matches[key] += 1
+    del results
+
+    peak_mb = None
+    if measure_memory:
+        # Separate pass: tracemalloc slows allocation enough to distort the timing above
+        engine = ENGINES[name]()
+        tracemalloc.start()
+        for text, _ in corpus:
+            engine(text)
+        peak_mb = tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+        tracemalloc.stop()
+
+    total = len(corpus) or 1
+    return {
+        "rows": len(corpus),
+        "seconds": round(elapsed, 4),
+        "rows_per_sec": round(len(corpus) / elapsed, 1) if elapsed else None,
+        "peak_memory_mb": round(peak_mb, 2) if peak_mb is not None else None,
+        "match_rates": {key: round(count / total, 4) for key, count in matches.items()}
+    }
+
+def compare(report, baseline, max_slowdown, max_accuracy_drop):
+    """Return a list of regressions of `report` against `baseline`."""
+    failures = []
+    for corpus_name, engines in report["results"].items():
+        for engine, result in engines.items():
+            reference = baseline.get("results", {}).get(corpus_name, {}).get(engine)
+            if not reference:
+                continue
+            if reference["rows_per_sec"] and result["rows_per_sec"] is not None:
+                floor = reference["rows_per_sec"] * (1 - max_slowdown)
+                if result["rows_per_sec"] < floor:
+                    failures.append(
+                        f"{corpus_name}/{engine}: {result['rows_per_sec']} rows/sec < {floor:.1f} "
+                        f"(baseline {reference['rows_per_sec']})"
+                    )
+            for key, rate in reference["match_rates"].items():
+                current = result["match_rates"].get(key, 0.0)
+                if current < rate - max_accuracy_drop:
+                    failures.append(f"{corpus_name}/{engine}: {key} match rate {current} < baseline {rate}")
+    return failures
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark extractor throughput and accuracy on data-final.csv.")
+    parser.add_argument("--data", default=DATA_FILE, help="Labeled CSV export")
+    parser.add_argument("--engines", nargs="+", default=list(ENGINES), choices=list(ENGINES))
+    parser.add_argument("--sizes", nargs="*", type=int, default=[100000, 1000000],
+                        help="Synthetic corpus sizes, in addition to the labeled file itself")
+    parser.add_argument("--unique-ratio", type=float, default=0.5, help="Share of synthetic rows made unique")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per engine; the fastest is kept")
+    parser.add_argument("--no-memory", action="store_true", help="Skip the peak memory pass")
+    parser.add_argument("--baseline", default=BASELINE_FILE)
+    parser.add_argument("--record", action="store_true", help="Write this run as the new baseline")
+    parser.add_argument("--max-slowdown", type=float, default=0.2, help="Allowed throughput drop (fraction)")
+    parser.add_argument("--max-accuracy-drop", type=float, default=0.01, help="Allowed match rate drop (absolute)")
+    parser.add_argument("--output", help="Also write the JSON report here")
+    args = parser.parse_args(argv)
+
+    rows = load_labeled_rows(args.data)
+    corpora = {"labeled": rows}
+    for size in args.sizes:
+        corpora[f"synthetic-{size}"] = synthetic_corpus(rows, size, args.unique_ratio)
+
+    report = {"patterns_version": PATTERNS_VERSION, "results": {}}
+    for corpus_name, corpus in corpora.items():
+        report["results"][corpus_name] = {}
+        for engine in args.engines:
+            result = run_engine(engine, corpus, measure_memory=not args.no_memory, repeat=args.repeat)
+            report["results"][corpus_name][engine] = result
+            print(f"{corpus_name:>18} {engine:>10}: {result['rows_per_sec']} rows/sec, "
+                  f"peak {result['peak_memory_mb']} MB")
+    print(json.dumps(report["results"]["labeled"], indent=2))
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2)
+
+    if args.record:
+        with open(args.baseline, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2)
+        print(f"Baseline recorded in {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; run with --record to create one")
+        return 0
+
+    with open(args.baseline, encoding="utf-8") as file:
+        baseline = json.load(file)
+    failures = compare(report, baseline, args.max_slowdown, args.max_accuracy_drop)
+    for failure in failures:
+        print(f"REGRESSION {failure}")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
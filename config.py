@@ -1,4 +1,5 @@
-URL = "https://barbechli.tn/search;subcategory=laptops;subcategories=laptops"
+BASE_URL = "https://barbechli.tn"
+URL = f"{BASE_URL}/search;subcategory=laptops;subcategories=laptops"
 CSV_FILENAME = "scraped_data.csv"
 DB_CONFIG = {
     "dbname": "barbechli",
@@ -7,3 +8,37 @@ DB_CONFIG = {
     "host": "localhost",
     "port": "5432"
 }
+
+# Streaming extraction (extractor.process_extracted_data_streaming)
+EXTRACT_CHUNKSIZE = 20000  # Rows read from the input CSV per chunk
+EXTRACT_WORKERS = None  # Process pool size; None uses os.cpu_count()
+
+# Extraction memoization (extractor.ExtractionCache)
+EXTRACTION_CACHE_SIZE = 50000  # Entries kept in the in-memory LRU
+EXTRACTION_CACHE_PATH = None  # SQLite file for a persistent cache, e.g. "extraction_cache.sqlite3"
+
+# Re-extraction backfill (backfill.py)
+BACKFILL_BATCH_SIZE = 1000  # Rows read and updated per keyset batch
+BACKFILL_CHECKPOINT = "backfill_checkpoint.json"
+
+# Parquet snapshot export (export.py)
+EXPORT_DIR = "exports"
+EXPORT_BATCH_SIZE = 50000  # Rows fetched from the server-side cursor per write
+
+# Storage backend behind database.py: "postgres" or "duckdb"
+DB_BACKEND = "postgres"
+DUCKDB_PATH = "barbechli.duckdb"
+
+# Instrumentation (metrics.py)
+LOG_LEVEL = "INFO"  # API log level; DEBUG logs every request and slows the server under load
+PROFILE_DIR = "profiles"  # Reports written by metrics.profiled
+PROFILE_REQUESTS = False  # Allow ?profile=true on API requests
+
+# Scraper run settings (scraper.scrape)
+MAX_PAGES = 96  # Listing pages to walk
+SCROLL_DELAY = 2  # Seconds between the scrolls that load a listing page
+PAGE_SETTLE_DELAY = 3  # Seconds to wait after navigating to the next listing page
+SCRAPE_CONCURRENCY = 1  # Product pages open at the same time
+
+# Offline replay (replay.py, scrape_benchmark.py)
+REPLAY_DIR = "replay"
@@ -1,56 +1,217 @@
 import dash
 from dash import dcc, html, dash_table
 import dash_bootstrap_components as dbc
+import numpy as np
 import pandas as pd
 import plotly.express as px
-from dash.dependencies import Input, Output
+import plotly.graph_objects as go
+from dash import no_update
+from dash.dependencies import Input, Output, State
+from dash.exceptions import PreventUpdate
 import requests
+from requests.adapters import HTTPAdapter
+import base64
+import json
+import math
+import re
+import threading
+import time
+from collections import namedtuple, OrderedDict
+from concurrent.futures import Future
+from urllib.parse import urlsplit
+from normalizer import normalize_ram, normalize_os, normalize_processor_brand
 
-# Function to fetch data from API
+API_URL = "http://localhost:8000"
+VERSION_CHECK_INTERVAL = 5  # Seconds between /products/version checks, shared by all sessions
+# Above this many listings the price histogram, scatter and box plot are sent pre-aggregated
+# (bins, counts, quartiles) instead of one point per listing; None keeps the raw figures
+SEUIL_AGREGATION = 5000
+NB_CLASSES_PRIX = 30
+NB_CLASSES_NUAGE = 100
+REQUEST_TIMEOUT = (3.05, 30)  # (connect, read) seconds for every API call
+
+# One pooled session for the whole process: keep-alive connections are reused across callbacks and sessions
+session = requests.Session()
+session.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=16))
+session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=16))
+
+# Raw column, typed column served by the API, fallback for rows whose typed column is still NULL
+NORMALISATIONS = (
+    ('ram', 'ram_gb', normalize_ram),
+    ('os', 'os_name', normalize_os),
+    ('processor_brand', 'cpu_brand', normalize_processor_brand)
+)
+
+# Function to fetch data from API; None when the download failed, so it is never mistaken for an empty table
 def fetch_data():
     try:
-        response = requests.get("http://localhost:8000/products")
+        response = session.get(f"{API_URL}/products", timeout=REQUEST_TIMEOUT)
+        response.raise_for_status()
         data = response.json()["products"]
+        if not data:
+            return pd.DataFrame(columns=['shop', 'price', 'company_link'])
         df_live = pd.DataFrame(data)
         df_live['price'] = pd.to_numeric(df_live['price'], errors='coerce')
         df_live.dropna(subset=['price'], inplace=True)
         df_live['shop'] = df_live['shop'].astype('category')
+        # The API serves values normalized at ingest (see normalizer.py). Rows stored before the typed
+        # columns existed keep them NULL until backfill.py runs, so normalize their raw value here instead.
+        for raw, typed, normaliser in NORMALISATIONS:
+            if typed in df_live:
+                valeurs = df_live[typed]
+                manquants = valeurs.isna()
+                if raw in df_live and manquants.any():
+                    valeurs = valeurs.astype(object)
+                    valeurs[manquants] = df_live.loc[manquants, raw].map(normaliser)
+                df_live[raw] = valeurs
+        for col in ('ram', 'ram_gb', 'storage_gb', 'screen_inches', 'cpu_generation'):
+            if col in df_live:
+                df_live[col] = pd.to_numeric(df_live[col], errors='coerce')
         return df_live
     except Exception as e:
         print(f"Erreur lors du chargement des données : {e}")
-        return pd.DataFrame(columns=['shop', 'price', 'shop_link'])
-
-# Initial data load
-df = fetch_data()
-
-# Data cleaning
-if not df.empty:
-    df['ram'] = df.get('ram', '').str.extract(r'(\d+)').astype(float, errors='ignore')
-    df['os'] = df.get('os', '').str.lower()
-    df['os'] = df['os'].str.replace(r'windows\s*\d+\s*', 'windows ', regex=True)
-    df['os'] = df['os'].str.replace('macos', 'macos')
-    df['os'] = df['os'].str.replace('freedos', 'free dos')
-
-    os_mapping = {
-        'windows 11': 'Windows 11',
-        'windows 11 home': 'Windows 11',
-        'windows 11 pro': 'Windows 11',
-        'windows 10': 'Windows 10',
-        'macos': 'macOS',
-        'free dos': 'FreeDOS'
-    }
+        return None
 
-    df['processor_brand'] = df.get('processor_brand', '').str.lower().str.strip()
-    processor_mapping = {
-        'intel': 'Intel',
-        'amd': 'AMD',
-        'apple': 'Apple',
-        'qualcomm': 'Qualcomm',
-        'mediatek': 'Mediatek'
-    }
+def fetch_version():
+    try:
+        response = session.get(f"{API_URL}/products/version", timeout=REQUEST_TIMEOUT)
+        response.raise_for_status()
+        return response.json()["version"]
+    except Exception as e:
+        print(f"Erreur lors de la lecture de la version des données : {e}")
+        return None
+
+Dataset = namedtuple('Dataset', ['df', 'search_text', 'version'])
+
+class DatasetCache:
+    """Cleaned, typed dataset shared by every session of this process.
+
+    /products is downloaded again only when /products/version changes, and the
+    version itself is checked at most once every `check_interval` seconds, so
+    interval ticks and filter interactions work on the in-memory copy. Once a
+    copy is loaded, checks run in a background thread and callers keep getting
+    the current copy meanwhile; only callers arriving before the first load
+    wait for it, bounded by REQUEST_TIMEOUT. The DataFrame is shared: callers
+    must filter into new frames, never mutate it.
+    """
+
+    def __init__(self, check_interval=VERSION_CHECK_INTERVAL):
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()  # One refresh at a time
+        self._checked_at = None
+        self._dataset = Dataset(pd.DataFrame(columns=['shop', 'price', 'company_link']), pd.Series(dtype=str), None)
+
+    def get(self):
+        with self._lock:
+            now = time.monotonic()
+            due = self._checked_at is None or now - self._checked_at >= self.check_interval
+            if due:
+                self._checked_at = now
+        if self._dataset.version is None:
+            if due:
+                self.refresh()
+            else:
+                with self._refresh_lock:  # Wait for the first load already in flight
+                    pass
+        elif due:
+            threading.Thread(target=self.refresh, name="dataset-refresh", daemon=True).start()
+        return self._dataset
+
+    def refresh(self):
+        with self._refresh_lock:
+            self._refresh()
+
+    def _refresh(self):
+        version = fetch_version()
+        if version is not None and version == self._dataset.version:
+            return
+        if version is None and not self._dataset.df.empty:
+            return  # API unreachable: keep serving the last good copy
+        df_live = fetch_data()
+        if df_live is None:
+            return  # Download failed: keep the current copy and version, so the next check fetches again
+        if version is None:
+            version = f"local-{time.time()}"  # API without /products/version: still give memo keys a fresh token
+        # Lower-cased text the keyword filter searches, built once per version instead of per keystroke
+        search_text = (
+            df_live.get('description', pd.Series('', index=df_live.index)).fillna('').astype(str) + ' ' +
+            df_live.get('company_link', pd.Series('', index=df_live.index)).fillna('').astype(str)
+        ).str.lower()
+        self._dataset = Dataset(df_live, search_text, version)
+
+cache = DatasetCache()
+
+def filtrer_donnees(dataset, plage_prix, boutiques, mot_cle):
+    """Apply the price / shop / keyword filters to the cached dataset."""
+    df = dataset.df
+    if df.empty:
+        return df
+    min_prix, max_prix = plage_prix
+    masque = (df['price'] >= min_prix) & (df['price'] <= max_prix)
+    if boutiques:
+        masque &= df['shop'].isin(boutiques)
+    if mot_cle:
+        masque &= dataset.search_text.str.contains(mot_cle.lower(), regex=False)
+    return df[masque]
+
+def prechauffer():
+    """Start loading the dataset in the background, so importing the module never waits on the API."""
+    threading.Thread(target=cache.get, name="dataset-warmup", daemon=True).start()
+
+def histogramme_agrege(df):
+    """Price histogram sent as precomputed bins: one bar per bin whatever the number of listings."""
+    comptes, bornes = np.histogram(df['price'], bins=NB_CLASSES_PRIX)
+    fig = go.Figure(go.Bar(
+        x=(bornes[:-1] + bornes[1:]) / 2, y=comptes, width=np.diff(bornes),
+        customdata=np.column_stack([bornes[:-1], bornes[1:]]),
+        hovertemplate="%{customdata[0]:,.0f} - %{customdata[1]:,.0f} TND<br>%{y} annonces<extra></extra>",
+        marker_color='#4E79A7'
+    ))
+    fig.update_layout(
+        title="Distribution des prix", template='plotly_white', bargap=0,
+        xaxis_title='Prix (TND)', yaxis_title="Nombre d'annonces"
+    )
+    return fig
+
+def nuage_agrege(df):
+    """Shop/price scatter aggregated per price bin, marker size following the number of listings."""
+    bornes = np.linspace(df['price'].min(), df['price'].max(), NB_CLASSES_NUAGE + 1)
+    classes = np.clip(np.searchsorted(bornes, df['price'], side='right') - 1, 0, NB_CLASSES_NUAGE - 1)
+    points = (
+        df.assign(prix_classe=((bornes[:-1] + bornes[1:]) / 2)[classes])
+        .groupby(['shop', 'prix_classe'], observed=True).size()
+        .reset_index(name="Nombre d'annonces")
+    )
+    return px.scatter(
+        points, x='shop', y='prix_classe', size="Nombre d'annonces", size_max=20,
+        title="Distribution des prix par boutique",
+        labels={'shop': 'Boutique', 'prix_classe': 'Prix (TND)'},
+        template='plotly_white',
+        color_discrete_sequence=['#E15759']
+    )
 
-    df['processor_brand'] = df['processor_brand'].replace(processor_mapping, regex=False)
-    df['os'] = df['os'].replace(os_mapping, regex=True)
+def boites_agregees(df):
+    """Box plot per OS from precomputed quartiles and 1.5 IQR whiskers; outlier points are left out."""
+    prix = df.dropna(subset=['os'])[['os', 'price']]
+    fig = go.Figure()
+    if not prix.empty:
+        quartiles = prix.groupby('os', observed=True)['price'].quantile([0.25, 0.5, 0.75]).unstack()
+        quartiles.columns = ['q1', 'median', 'q3']
+        bornes = prix.join(quartiles, on='os')
+        ecart = bornes['q3'] - bornes['q1']
+        dans = bornes[(bornes['price'] >= bornes['q1'] - 1.5 * ecart) & (bornes['price'] <= bornes['q3'] + 1.5 * ecart)]
+        moustaches = dans.groupby('os', observed=True)['price'].agg(['min', 'max']).reindex(quartiles.index)
+        fig.add_trace(go.Box(
+            x=list(quartiles.index), q1=quartiles['q1'], median=quartiles['median'], q3=quartiles['q3'],
+            lowerfence=moustaches['min'], upperfence=moustaches['max'],
+            marker_color='#FF9DA7', name=''
+        ))
+    fig.update_layout(
+        title="Distribution des prix par système d'exploitation", template='plotly_white',
+        xaxis_title='Système', yaxis_title='Prix (TND)'
+    )
+    return fig
 
 # Function to create graphs
 def créer_graphiques(df):
@@ -64,21 +225,43 @@ def créer_graphiques(df):
     shop_counts.columns = ['Boutique', "Nombre d'annonces"]
     
     os_prices = df.groupby('os')['price'].mean().reset_index().sort_values('price', ascending=False)
-    ram_prices = df.groupby('ram')['price'].mean().reset_index()
-    storage_counts = df.get('storage', pd.Series([])).value_counts().reset_index()
-    storage_counts.columns = ['Stockage', "Nombre d'annonces"]
     processor_counts = df.get('processor_brand', pd.Series([])).value_counts().reset_index()
     processor_counts.columns = ['Marque', "Nombre d'annonces"]
     processor_prices = df.groupby('processor_brand')['price'].mean().reset_index().sort_values('price', ascending=False)
 
+    if SEUIL_AGREGATION is not None and len(df) > SEUIL_AGREGATION:
+        prix = {
+            'hist_prix': histogramme_agrege(df),
+            'nuage_prix': nuage_agrege(df),
+            'box_prix_os': boites_agregees(df)
+        }
+    else:
+        prix = {
+            'hist_prix': px.histogram(
+                df, x='price', nbins=NB_CLASSES_PRIX,
+                title="Distribution des prix",
+                labels={'price': 'Prix (TND)', 'count': "Nombre d'annonces"},
+                template='plotly_white',
+                color_discrete_sequence=['#4E79A7']
+            ),
+            'nuage_prix': px.scatter(
+                df, x='shop', y='price',
+                title="Distribution des prix par boutique",
+                labels={'shop': 'Boutique', 'price': 'Prix (TND)'},
+                template='plotly_white',
+                color_discrete_sequence=['#E15759']
+            ),
+            'box_prix_os': px.box(
+                df, x='os', y='price',
+                title="Distribution des prix par système d'exploitation",
+                labels={'os': 'Système', 'price': 'Prix (TND)'},
+                template='plotly_white',
+                color_discrete_sequence=['#FF9DA7']
+            )
+        }
+
     return {
-        'hist_prix': px.histogram(
-            df, x='price', nbins=30,
-            title="Distribution des prix",
-            labels={'price': 'Prix (TND)', 'count': "Nombre d'annonces"},
-            template='plotly_white',
-            color_discrete_sequence=['#4E79A7']
-        ),
+        **prix,
         'bar_boutiques': px.bar(
             shop_counts, x='Boutique', y="Nombre d'annonces",
             title="Nombre d'annonces par boutique",
@@ -91,13 +274,6 @@ def créer_graphiques(df):
             template='plotly_white',
             hole=0.3
         ),
-        'nuage_prix': px.scatter(
-            df, x='shop', y='price',
-            title="Distribution des prix par boutique",
-            labels={'shop': 'Boutique', 'price': 'Prix (TND)'},
-            template='plotly_white',
-            color_discrete_sequence=['#E15759']
-        ),
         'bar_os_prix': px.bar(
             os_prices, x='os', y='price',
             title="Prix moyen par système d'exploitation",
@@ -110,37 +286,126 @@ def créer_graphiques(df):
             title="Répartition des marques de processeurs",
             template='plotly_white',
             hole=0.4
-        ),
-        'box_prix_os': px.box(
-            df, x='os', y='price',
-            title="Distribution des prix par système d'exploitation",
-            labels={'os': 'Système', 'price': 'Prix (TND)'},
-            template='plotly_white',
-            color_discrete_sequence=['#FF9DA7']
         )
     }
 
-# Create initial graphs
-graphiques = créer_graphiques(df)
-
-# Customize graphs
-for fig in graphiques.values():
-    fig.update_layout(
-        plot_bgcolor='rgba(0,0,0,0)',
-        paper_bgcolor='rgba(0,0,0,0)',
-        font=dict(family="Arial, sans-serif", color='#333333'),
-        margin=dict(l=20, r=20, t=60, b=20),
-        title_font=dict(size=16, color='#2E3F4F'),
-        hoverlabel=dict(
-            bgcolor="white",
-            font_size=12,
-            font_family="Arial"
+def styliser(graphiques):
+    """Shared look for every figure."""
+    for fig in graphiques.values():
+        fig.update_layout(
+            plot_bgcolor='rgba(0,0,0,0)',
+            paper_bgcolor='rgba(0,0,0,0)',
+            font=dict(family="Arial, sans-serif", color='#333333'),
+            margin=dict(l=20, r=20, t=60, b=20),
+            title_font=dict(size=16, color='#2E3F4F'),
+            hoverlabel=dict(
+                bgcolor="white",
+                font_size=12,
+                font_family="Arial"
+            )
         )
-    )
+    return graphiques
+
+class LRUCache:
+    """Small thread-safe LRU; get_or_build runs `build` once per missing key."""
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._building = {}  # key -> Future of the build in progress
+        self._lock = threading.Lock()
+
+    def get_or_build(self, key, build):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+            # Callbacks firing together for one change wait on the same build; other keys build in parallel
+            future = self._building.get(key)
+            owner = future is None
+            if owner:
+                future = self._building[key] = Future()
+        if not owner:
+            return future.result()
+
+        try:
+            value = build()
+        except BaseException as e:
+            with self._lock:
+                del self._building[key]
+            future.set_exception(e)
+            raise
+        with self._lock:
+            self._entries[key] = value
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+            del self._building[key]
+        future.set_result(value)
+        return value
+
+Filtrage = namedtuple('Filtrage', ['cle', 'signature', 'df'])
+
+filtrages = LRUCache(maxsize=16)
+figures = LRUCache(maxsize=32)
+
+# Figure groups, each refreshed by its own callback
+GROUPES_FIGURES = {
+    'prix': {'hist_prix': 'hist-prix'},
+    'boutiques': {'bar_boutiques': 'bar-boutiques', 'camembert': 'camembert', 'nuage_prix': 'nuage-prix'},
+    'systemes': {'bar_os_prix': 'bar-os-prix', 'pie_processeurs': 'pie-processeurs', 'box_prix_os': 'box-prix-os'}
+}
+
+def filtrer(plage_prix, boutiques, mot_cle):
+    """Filtered view of the cached dataset, memoized by (data version, filter tuple).
+
+    The signature identifies the filtered rows, so two filter states selecting
+    the same listings are recognised as unchanged.
+    """
+    dataset = cache.get()
+    filtres = (tuple(plage_prix or ()), tuple(sorted(boutiques or [])), (mot_cle or '').strip().lower())
+    cle = (dataset.version, filtres)
+
+    def construire():
+        df_filtre = filtrer_donnees(dataset, plage_prix or [0, float('inf')], boutiques, mot_cle)
+        empreinte = int(pd.util.hash_pandas_object(df_filtre.index, index=False).sum()) if not df_filtre.empty else 0
+        return Filtrage(cle, f"{dataset.version}:{len(df_filtre)}:{empreinte}", df_filtre)
+
+    return filtrages.get_or_build(cle, construire)
+
+def graphiques_pour(filtrage):
+    """créer_graphiques results, memoized by (data version, filter tuple)."""
+    return figures.get_or_build(filtrage.cle, lambda: styliser(créer_graphiques(filtrage.df)))
+
+# True: ship a compact copy of the data once per version and filter it in the browser.
+# Suited to moderate dataset sizes; the table keeps its server-side paging either way.
+FILTRAGE_CLIENT = False
+
+# Columns shown in the table; long descriptions stay out of the payload
+COLONNES_TABLE = ['shop', 'price', 'type', 'processor_brand', 'processor', 'ram', 'storage', 'gpu', 'screen', 'os', 'company_link']
+
+# DataTable filter operators -> API column filter operators; word operators first, then longest symbols first
+OPERATEURS_TABLE = [
+    (' icontains ', 'contains'), (' scontains ', 'contains'), (' contains ', 'contains'),
+    (' ge ', '>='), (' le ', '<='), (' lt ', '<'), (' gt ', '>'), (' ne ', '!='), (' eq ', '='),
+    ('s>=', '>='), ('s<=', '<='), ('s!=', '!='), ('>=', '>='), ('<=', '<='), ('!=', '!='),
+    ('s>', '>'), ('s<', '<'), ('s=', '='), ('>', '>'), ('<', '<'), ('=', '=')
+]
+
+# Skeletons shown until the first data version reaches the page
+FIGURE_CHARGEMENT = go.Figure(layout=dict(
+    title=dict(text="Chargement des données...", font=dict(size=16, color='#2E3F4F')),
+    xaxis=dict(visible=False), yaxis=dict(visible=False),
+    plot_bgcolor='rgba(0,0,0,0)', paper_bgcolor='rgba(0,0,0,0)',
+    font=dict(family="Arial, sans-serif", color='#333333')
+))
+
+def squelette_kpi():
+    return dbc.Placeholder(xs=6, animation='glow')
 
 # Initialize app
 app = dash.Dash(__name__, external_stylesheets=[dbc.themes.LUX])
 app.title = "Tableau de Bord des Annonces"
+prechauffer()
 
 # Color palette
 colors = {
@@ -163,6 +428,12 @@ app.layout = dbc.Container(
     children=[
         # Auto-refresh interval
         dcc.Interval(id="interval-component", interval=10*1000, n_intervals=0),
+        dcc.Store(id='version-donnees'),
+        # Last filtered-rows signature sent to this session, per output group
+        *[dcc.Store(id=f'signature-{groupe}') for groupe in GROUPES_FIGURES],
+        # Keyset cursors of the table pages already visited, for the current query
+        dcc.Store(id='curseurs-table'),
+        dcc.Store(id='donnees-compactes'),
         
         # Header
         dbc.Row([
@@ -191,7 +462,7 @@ app.layout = dbc.Container(
                 dbc.Card([
                     dbc.CardBody([
                         html.H6("TOTAL ANNONCES", className="card-subtitle", style={'color': colors['text']}),
-                        html.H3(id='total-annonces', children=f"{len(df):,}" if not df.empty else "0", 
+                        html.H3(id='total-annonces', children=squelette_kpi(), 
                                 className="card-title mt-2", style={'color': colors['accent']}),
                     ])
                 ], style={
@@ -205,7 +476,7 @@ app.layout = dbc.Container(
                 dbc.Card([
                     dbc.CardBody([
                         html.H6("PRIX MOYEN", className="card-subtitle", style={'color': colors['text']}),
-                        html.H3(id='prix-moyen', children=f"{df['price'].mean():,.0f} TND" if not df['price'].empty else "N/A", 
+                        html.H3(id='prix-moyen', children=squelette_kpi(), 
                                 className="card-title mt-2", style={'color': colors['accent']}),
                     ])
                 ], style={
@@ -219,7 +490,7 @@ app.layout = dbc.Container(
                 dbc.Card([
                     dbc.CardBody([
                         html.H6("PRIX MAX", className="card-subtitle", style={'color': colors['text']}),
-                        html.H3(id='prix-max', children=f"{df['price'].max():,.0f} TND" if not df['price'].empty else "N/A", 
+                        html.H3(id='prix-max', children=squelette_kpi(), 
                                 className="card-title mt-2", style={'color': colors['accent']}),
                     ])
                 ], style={
@@ -233,7 +504,7 @@ app.layout = dbc.Container(
                 dbc.Card([
                     dbc.CardBody([
                         html.H6("BOUTIQUES", className="card-subtitle", style={'color': colors['text']}),
-                        html.H3(id='nb-boutiques', children=f"{len(df['shop'].unique()):,}" if not df.empty else "0", 
+                        html.H3(id='nb-boutiques', children=squelette_kpi(), 
                                 className="card-title mt-2", style={'color': colors['accent']}),
                     ])
                 ], style={
@@ -268,6 +539,7 @@ app.layout = dbc.Container(
         dbc.Row([
             dbc.Col(
                 dcc.Graph(
+                    figure=FIGURE_CHARGEMENT,
                     id='bar-os-prix',
                     style={
                         'backgroundColor': colors['card_background'],
@@ -282,6 +554,7 @@ app.layout = dbc.Container(
             ),
             dbc.Col(
                 dcc.Graph(
+                    figure=FIGURE_CHARGEMENT,
                     id='pie-processeurs',
                     style={
                         'backgroundColor': colors['card_background'],
@@ -300,6 +573,7 @@ app.layout = dbc.Container(
         dbc.Row([
             dbc.Col(
                 dcc.Graph(
+                    figure=FIGURE_CHARGEMENT,
                     id='box-prix-os',
                     style={
                         'backgroundColor': colors['card_background'],
@@ -318,6 +592,7 @@ app.layout = dbc.Container(
         dbc.Row([
             dbc.Col(
                 dcc.Graph(
+                    figure=FIGURE_CHARGEMENT,
                     id='hist-prix',
                     style={
                         'backgroundColor': colors['card_background'],
@@ -332,6 +607,7 @@ app.layout = dbc.Container(
             ),
             dbc.Col(
                 dcc.Graph(
+                    figure=FIGURE_CHARGEMENT,
                     id='bar-boutiques',
                     style={
                         'backgroundColor': colors['card_background'],
@@ -350,6 +626,7 @@ app.layout = dbc.Container(
         dbc.Row([
             dbc.Col(
                 dcc.Graph(
+                    figure=FIGURE_CHARGEMENT,
                     id='camembert',
                     style={
                         'backgroundColor': colors['card_background'],
@@ -364,6 +641,7 @@ app.layout = dbc.Container(
             ),
             dbc.Col(
                 dcc.Graph(
+                    figure=FIGURE_CHARGEMENT,
                     id='nuage-prix',
                     style={
                         'backgroundColor': colors['card_background'],
@@ -414,17 +692,17 @@ app.layout = dbc.Container(
                         dcc.RangeSlider(
                             id='slider-prix',
                             min=0,
-                            max=int(df['price'].max()) if not df.empty else 10000,
+                            max=10000,
                             step=500,
-                            value=[0, int(df['price'].max()) if not df.empty else 5000],
-                            marks={i: f"{i:,}" for i in range(0, int(df['price'].max())+1, 2000)} if not df.empty else {0: "0", 10000: "10000"},
+                            value=[0, 10000],
+                            marks={0: "0", 10000: "10000"},
                             tooltip={"placement": "bottom", "always_visible": True},
                             className="mb-4"
                         ),
                         html.Label("Sélection des boutiques:", className="mb-2", style={'color': colors['text']}),
                         dcc.Dropdown(
                             id='dropdown-boutiques',
-                            options=[{'label': b, 'value': b} for b in sorted(df['shop'].unique())] if not df.empty else [],
+                            options=[],
                             multi=True,
                             placeholder="Toutes les boutiques...",
                             className="mb-4",
@@ -489,9 +767,11 @@ app.layout = dbc.Container(
                     dbc.CardBody([
                         dash_table.DataTable(
                             id='table-donnees',
-                            columns=[{"name": col, "id": col} for col in df.columns] if not df.empty else [],
-                            data=df.to_dict('records') if not df.empty else [],
+                            columns=[{"name": col, "id": col} for col in COLONNES_TABLE],
+                            data=[],
+                            page_current=0,
                             page_size=10,
+                            page_count=1,
                             style_table={
                                 'overflowX': 'auto',
                                 'border': 'none',
@@ -518,8 +798,13 @@ app.layout = dbc.Container(
                                     'backgroundColor': colors['background']
                                 }
                             ],
-                            filter_action="native",
-                            sort_action="native"
+                            # Paging, sorting and filtering run in the API, so only the visible page is sent
+                            page_action="custom",
+                            filter_action="custom",
+                            filter_query="",
+                            sort_action="custom",
+                            sort_mode="single",
+                            sort_by=[]
                         )
                     ], style={
                         'backgroundColor': colors['card_background'],
@@ -536,142 +821,227 @@ app.layout = dbc.Container(
     ]
 )
 
-# Callback to update dashboard
+# Data version: dropdown options and slider range only change with the data
 @app.callback(
     [
-        Output('hist-prix', 'figure'),
-        Output('bar-boutiques', 'figure'),
-        Output('camembert', 'figure'),
-        Output('nuage-prix', 'figure'),
-        Output('bar-os-prix', 'figure'),
-        Output('pie-processeurs', 'figure'),
-        Output('box-prix-os', 'figure'),
-        Output('table-donnees', 'data'),
-        Output('table-donnees', 'columns'),
+        Output('version-donnees', 'data'),
         Output('dropdown-boutiques', 'options'),
         Output('slider-prix', 'max'),
         Output('slider-prix', 'marks'),
-        Output('total-annonces', 'children'),
-        Output('prix-moyen', 'children'),
-        Output('prix-max', 'children'),
-        Output('nb-boutiques', 'children')
+        Output('slider-prix', 'value')
     ],
-    [
-        Input('interval-component', 'n_intervals'),
-        Input('slider-prix', 'value'),
-        Input('dropdown-boutiques', 'value'),
-        Input('input-recherche', 'value')
-    ]
+    Input('interval-component', 'n_intervals'),
+    [State('version-donnees', 'data'), State('slider-prix', 'value'), State('slider-prix', 'max')]
 )
-def update_dashboard(n, plage_prix, boutiques, mot_cle):
-    # Fetch fresh data
-    df = fetch_data()
-    
+def update_version(n, version_actuelle, plage_prix, max_actuel):
+    dataset = cache.get()
+    if dataset.version == version_actuelle:
+        raise PreventUpdate
+    df = dataset.df
     if df.empty:
-        empty_fig = px.scatter(title="No Data Available")
-        return (
-            empty_fig, empty_fig, empty_fig, empty_fig, empty_fig, empty_fig, empty_fig,
-            [], [], [], 10000, {0: "0", 10000: "10000"},
-            "0", "N/A", "N/A", "0"
-        )
-
-    # Apply data cleaning
-    df['ram'] = df.get('ram', '').str.extract(r'(\d+)').astype(float, errors='ignore')
-    df['os'] = df.get('os', '').str.lower()
-    df['os'] = df['os'].str.replace(r'windows\s*\d+\s*', 'windows ', regex=True)
-    df['os'] = df['os'].str.replace('macos', 'macos')
-    df['os'] = df['os'].str.replace('freedos', 'free dos')
-
-    os_mapping = {
-        'windows 11': 'Windows 11',
-        'windows 11 home': 'Windows 11',
-        'windows 11 pro': 'Windows 11',
-        'windows 10': 'Windows 10',
-        'macos': 'macOS',
-        'free dos': 'FreeDOS'
-    }
-
-    df['processor_brand'] = df.get('processor_brand', '').str.lower().str.strip()
-    processor_mapping = {
-        'intel': 'Intel',
-        'amd': 'AMD',
-        'apple': 'Apple',
-        'qualcomm': 'Qualcomm',
-        'mediatek': 'Mediatek'
-    }
-
-    df['processor_brand'] = df['processor_brand'].replace(processor_mapping, regex=False)
-    df['os'] = df['os'].replace(os_mapping, regex=True)
-
-    # Apply filters
-    min_prix, max_prix = plage_prix
-    df_filtre = df[(df['price'] >= min_prix) & (df['price'] <= max_prix)]
-    
-    if boutiques:
-        df_filtre = df_filtre[df_filtre['shop'].isin(boutiques)]
-    
-    if mot_cle:
-        df_filtre = df_filtre[df_filtre['shop_link'].str.contains(mot_cle, case=False, na=False)]
-    
-    # # Debug KPI calculations
-    # print(f"Raw DataFrame size: {len(df)}")
-    # print(f"Filtered DataFrame size: {len(df_filtre)}")
-    # print(f"Price values (filtered): {df_filtre['price'].tolist()}")
-    
-    # Generate graphs
-    graphiques = créer_graphiques(df_filtre)
-    
-    # Customize graphs
-    for fig in graphiques.values():
-        fig.update_layout(
-            plot_bgcolor='rgba(0,0,0,0)',
-            paper_bgcolor='rgba(0,0,0,0)',
-            font=dict(family="Arial, sans-serif", color='#333333'),
-            margin=dict(l=20, r=20, t=60, b=20),
-            title_font=dict(size=16, color='#2E3F4F'),
-            hoverlabel=dict(
-                bgcolor="white",
-                font_size=12,
-                font_family="Arial"
-            )
-        )
+        return dataset.version, [], 10000, {0: "0", 10000: "10000"}, no_update
 
     # Update dropdown options
     boutique_options = [{'label': b, 'value': b} for b in sorted(df['shop'].unique())]
-    
+
     # Update slider
     max_price = int(df['price'].max()) if not df['price'].empty else 10000
     marks = {i: f"{i:,}" for i in range(0, max_price+1, 2000)}
-    
+    # A range left open at the top (including the placeholder range of a fresh page) follows the new maximum
+    if not plage_prix or max_actuel is None or plage_prix[1] >= max_actuel:
+        plage = [plage_prix[0] if plage_prix else 0, max_price]
+    else:
+        plage = no_update
+    return dataset.version, boutique_options, max_price, marks, plage
+
+FILTRES = [
+    Input('version-donnees', 'data'),
+    Input('slider-prix', 'value'),
+    Input('dropdown-boutiques', 'value'),
+    Input('input-recherche', 'value')
+]
+
+def enregistrer_groupe(groupe, ids):
+    """One callback per figure group; unchanged groups are answered with no_update."""
+    @app.callback(
+        [Output(id_graphique, 'figure') for id_graphique in ids.values()] + [Output(f'signature-{groupe}', 'data')],
+        FILTRES,
+        State(f'signature-{groupe}', 'data')
+    )
+    def update_groupe(version, plage_prix, boutiques, mot_cle, signature_precedente):
+        filtrage = filtrer(plage_prix, boutiques, mot_cle)
+        if filtrage.signature == signature_precedente:
+            return [no_update] * (len(ids) + 1)
+        graphiques = graphiques_pour(filtrage)
+        return [graphiques[cle] for cle in ids] + [filtrage.signature]
+
+    return update_groupe
+
+SORTIES_KPI = [
+    Output('total-annonces', 'children'),
+    Output('prix-moyen', 'children'),
+    Output('prix-max', 'children'),
+    Output('nb-boutiques', 'children')
+]
+
+def update_kpis(version, plage_prix, boutiques, mot_cle):
+    df_filtre = filtrer(plage_prix, boutiques, mot_cle).df
+
     # KPI calculations with explicit checks
     total_annonces = f"{len(df_filtre):,}" if not df_filtre.empty else "0"
     prix_moyen = f"{df_filtre['price'].mean():,.0f} TND" if not df_filtre['price'].empty else "N/A"
     prix_max = f"{df_filtre['price'].max():,.0f} TND" if not df_filtre['price'].empty else "N/A"
     nb_boutiques = f"{len(df_filtre['shop'].unique()):,}" if not df_filtre.empty else "0"
+    return total_annonces, prix_moyen, prix_max, nb_boutiques
+
+def encoder_colonne(serie):
+    """Dictionary-encode a column: {'codes': [...], 'labels': [...]}, code -1 for missing values."""
+    codes, labels = pd.factorize(serie.astype(object), use_na_sentinel=True)
+    return {'codes': codes.tolist(), 'labels': [str(label) for label in labels]}
+
+# Words of the keyword index: runs of letters and digits, as split by filtrage_client.js
+MOTS = re.compile(r"[^\W_]+")
 
-    # print(f"KPI - Total Annonces: {total_annonces}")
-    # print(f"KPI - Prix Moyen: {prix_moyen}")
-    # print(f"KPI - Prix Max: {prix_max}")
-    # print(f"KPI - Nombre Boutiques: {nb_boutiques}")
-
-    return (
-        graphiques['hist_prix'],
-        graphiques['bar_boutiques'],
-        graphiques['camembert'],
-        graphiques['nuage_prix'],
-        graphiques['bar_os_prix'],
-        graphiques['pie_processeurs'],
-        graphiques['box_prix_os'],
-        df_filtre.to_dict('records'),
-        [{"name": col, "id": col} for col in df_filtre.columns],
-        boutique_options,
-        max_price,
-        marks,
-        total_annonces,
-        prix_moyen,
-        prix_max,
-        nb_boutiques
+def encoder_lignes(positions, nb_lignes):
+    """Row positions of one word: gaps between positions, or a base64 bitmap when the word is common."""
+    if len(positions) * 16 > nb_lignes:
+        bits = bytearray((nb_lignes + 7) // 8)
+        for position in positions:
+            bits[position >> 3] |= 1 << (position & 7)
+        return base64.b64encode(bytes(bits)).decode()
+    return np.diff(positions, prepend=0).tolist()
+
+def indexer_mots(df):
+    """Keyword index for the clientside filter: sorted words and, for each, the rows containing it.
+
+    Words come from the description and the path of company_link; the query
+    string only carries tracking parameters shared by every listing. Shipping
+    each word once is several times smaller than the full search text.
+    """
+    description = df.get('description', pd.Series('', index=df.index)).fillna('').astype(str)
+    chemin = df.get('company_link', pd.Series('', index=df.index)).fillna('').astype(str).map(
+        lambda lien: urlsplit(lien).path
     )
+    lignes = {}
+    for position, texte in enumerate((description + ' ' + chemin).str.lower()):
+        for mot in set(MOTS.findall(texte)):
+            lignes.setdefault(mot, []).append(position)
+    mots = sorted(lignes)
+    return mots, [encoder_lignes(lignes[mot], len(df)) for mot in mots]
+
+def construire_donnees_compactes(dataset):
+    """Column-oriented copy of the fields the clientside callbacks filter and plot."""
+    df = dataset.df
+    if df.empty:
+        return {'version': dataset.version, 'price': []}
+    mots, lignes_mots = indexer_mots(df)
+    return {
+        'version': dataset.version,
+        'price': df['price'].astype(float).tolist(),
+        'shop': encoder_colonne(df['shop']),
+        'os': encoder_colonne(df['os']) if 'os' in df else None,
+        'processor_brand': encoder_colonne(df['processor_brand']) if 'processor_brand' in df else None,
+        'mots': mots,
+        'lignes_mots': lignes_mots
+    }
+
+compactes = LRUCache(maxsize=2)
+
+if FILTRAGE_CLIENT:
+    # Shipped once per data version; filtering, figures and KPIs then run in the browser
+    # (assets/filtrage_client.js), so slider drags and keystrokes never reach the server.
+    @app.callback(Output('donnees-compactes', 'data'), Input('version-donnees', 'data'))
+    def update_donnees_compactes(version):
+        dataset = cache.get()
+        return compactes.get_or_build(dataset.version, lambda: construire_donnees_compactes(dataset))
+
+    app.clientside_callback(
+        dash.ClientsideFunction(namespace='filtrage', function_name='mettre_a_jour'),
+        [Output(id_graphique, 'figure') for ids in GROUPES_FIGURES.values() for id_graphique in ids.values()]
+        + SORTIES_KPI,
+        [
+            Input('donnees-compactes', 'data'),
+            Input('slider-prix', 'value'),
+            Input('dropdown-boutiques', 'value'),
+            Input('input-recherche', 'value')
+        ]
+    )
+else:
+    for groupe, ids in GROUPES_FIGURES.items():
+        enregistrer_groupe(groupe, ids)
+    app.callback(SORTIES_KPI, FILTRES)(update_kpis)
+
+def decouper_filtre(partie):
+    """'{price} s> 2000' -> ('price', '>', '2000'), following DataTable's custom filter syntax."""
+    for operateur_table, operateur in OPERATEURS_TABLE:
+        if operateur_table in partie:
+            nom, valeur = partie.split(operateur_table, 1)
+            nom = nom[nom.find('{') + 1: nom.rfind('}')]
+            valeur = valeur.strip()
+            if valeur[:1] == valeur[-1:] and valeur[:1] in ("'", '"', '`'):
+                valeur = valeur[1:-1]
+            return nom, operateur, valeur
+    return None
+
+@app.callback(
+    [
+        Output('table-donnees', 'data'),
+        Output('table-donnees', 'page_count'),
+        Output('table-donnees', 'page_current'),
+        Output('curseurs-table', 'data')
+    ],
+    [
+        Input('table-donnees', 'page_current'),
+        Input('table-donnees', 'page_size'),
+        Input('table-donnees', 'sort_by'),
+        Input('table-donnees', 'filter_query'),
+        *FILTRES
+    ],
+    State('curseurs-table', 'data')
+)
+def update_table(page_current, page_size, sort_by, filter_query, version, plage_prix, boutiques, mot_cle, curseurs):
+    params = {
+        'shop': boutiques or [],
+        'q': mot_cle or None,
+        'filter': [],
+        'fields': COLONNES_TABLE,
+        'limit': page_size
+    }
+    if plage_prix:
+        params['min_price'], params['max_price'] = plage_prix
+    if sort_by:
+        params['sort_by'] = sort_by[0]['column_id']
+        params['order'] = 'desc' if sort_by[0]['direction'] == 'desc' else 'asc'
+    for partie in (filter_query or '').split(' && '):
+        filtre = decouper_filtre(partie)
+        if filtre:
+            params['filter'].append('|'.join(filtre))
+
+    # A new query (filters, sort, page size or data version) starts again from the first page
+    cle = json.dumps([params, version], sort_keys=True)
+    if not curseurs or curseurs['cle'] != cle:
+        curseurs = {'cle': cle, 'pages': {'0': None}}
+        page_current = 0
+    page_current = page_current or 0
+
+    curseur = curseurs['pages'].get(str(page_current))
+    if curseur is not None:
+        params['cursor'] = curseur
+    elif page_current:
+        params['offset'] = page_current * page_size  # Jump to a page no cursor is known for
+
+    try:
+        response = session.get(f"{API_URL}/products", params=params, timeout=REQUEST_TIMEOUT)
+        response.raise_for_status()
+        page = response.json()
+    except Exception as e:
+        print(f"Erreur lors du chargement de la page : {e}")
+        return [], 1, page_current, curseurs
+
+    if page['next_cursor']:
+        curseurs['pages'][str(page_current + 1)] = page['next_cursor']
+    page_count = max(1, math.ceil(page['total'] / page_size))
+    return page['products'], page_count, page_current, curseurs
 
 if __name__ == '__main__':
     app.run(debug=True)
\ No newline at end of file
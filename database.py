@@ -1,129 +1,392 @@
 import psycopg2
-from config import DB_CONFIG
-from extractor import extract_characteristics,process_single_product  # Function to process details
+from abc import ABC, abstractmethod
+from config import DB_CONFIG, DB_BACKEND, DUCKDB_PATH
+from extractor import extract_characteristics,process_single_product, PATTERNS_VERSION  # Function to process details
+from normalizer import normalize_characteristics, parse_price, NORMALIZATION_VERSION
+from metrics import PRODUCTS, timed
 import logging
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def check_duplicate(company_link):
-    """Check if a product with the same companyLink already exists in the database."""
-    try:
-        conn = psycopg2.connect(**DB_CONFIG)
+# Typed columns filled by normalizer.normalize_characteristics at ingest time
+NORMALIZED_COLUMNS = {
+    "ram_gb": "REAL",
+    "storage_gb": "REAL",
+    "storage_medium": "TEXT",
+    "screen_inches": "REAL",
+    "os_name": "TEXT",
+    "cpu_brand": "TEXT",
+    "cpu_generation": "SMALLINT"
+}
+
+# Bookkeeping columns: extraction version for backfill.py, timestamps for export.py
+TRACKING_COLUMNS = {
+    "extraction_version": "TEXT",
+    "updated_at": "TIMESTAMP",
+    "scraped_at": "TIMESTAMP"
+}
+
+# Defaults set after the columns are added, so existing rows keep NULL instead of the migration time
+COLUMN_DEFAULTS = {
+    "scraped_at": "now()"
+}
+
+# Numeric copy of the scraped price text, so filters and aggregates can run in SQL
+PRICE_COLUMNS = {
+    "price_value": "DOUBLE PRECISION"
+}
+
+# products column -> field name served by the /products API
+API_COLUMNS = {
+    "id": "id",
+    "company_path": "company_link",
+    "description": "description",
+    "price": "price",
+    "company": "shop",
+    "type": "type",
+    "model": "model",
+    "processor_brand": "processor_brand",
+    "processor": "processor",
+    "ram": "ram",
+    "gpu": "gpu",
+    "screen": "screen",
+    "color": "color",
+    "os": "os",
+    "storage": "storage",
+    **{column: column for column in NORMALIZED_COLUMNS}
+}
+
+# Fields the aggregate endpoint can group by -> products column
+GROUP_COLUMNS = {
+    "shop": "company",
+    "os": "os_name",
+    "processor_brand": "cpu_brand",
+    "ram": "ram_gb",
+    "storage": "storage_gb",
+    "storage_medium": "storage_medium",
+    "screen": "screen_inches",
+    "cpu_generation": "cpu_generation"
+}
+
+# Fields the paginated /products can sort and filter on -> products column
+SORT_COLUMNS = {
+    **{api_name: column for column, api_name in API_COLUMNS.items() if column != "description"},
+    "price": "price_value"
+}
+
+NUMERIC_COLUMNS = {
+    column for column, column_type in {**NORMALIZED_COLUMNS, **PRICE_COLUMNS}.items() if column_type != "TEXT"
+}
+
+# Operators accepted in column filters: (column, operator, value)
+COLUMN_OPERATORS = {"=", "!=", "<", "<=", ">", ">=", "contains"}
+
+# Changes with the extractor patterns or the normalization rules
+EXTRACTION_VERSION = f"{PATTERNS_VERSION}.{NORMALIZATION_VERSION}"
+
+def build_filters(filters, placeholder="%s"):
+    """WHERE clause and parameters for the /products filters.
+
+    `filters` may hold min_price, max_price, shops (list) and keyword, which is
+    matched case-insensitively against the description and the shop link, plus
+    `columns`: (field, operator, value) triples on SORT_COLUMNS fields.
+    """
+    clauses, params = [], []
+    filters = filters or {}
+    if filters.get("min_price") is not None:
+        clauses.append(f"price_value >= {placeholder}")
+        params.append(filters["min_price"])
+    if filters.get("max_price") is not None:
+        clauses.append(f"price_value <= {placeholder}")
+        params.append(filters["max_price"])
+    if filters.get("shops"):
+        clauses.append(f"company IN ({', '.join([placeholder] * len(filters['shops']))})")
+        params.extend(filters["shops"])
+    if filters.get("keyword"):
+        clauses.append(f"(description ILIKE {placeholder} OR company_path ILIKE {placeholder})")
+        params.extend([f"%{filters['keyword']}%"] * 2)
+    for field, operator, value in filters.get("columns") or []:
+        column = SORT_COLUMNS[field]
+        if operator == "contains":
+            clauses.append(f"CAST({column} AS TEXT) ILIKE {placeholder}")
+            params.append(f"%{value}%")
+        else:
+            clauses.append(f"{column} {operator} {placeholder}")
+            params.append(float(value) if column in NUMERIC_COLUMNS else str(value))
+    where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+    return where, params
+
+class StorageBackend(ABC):
+    """Storage operations behind the module-level functions of database.py.
+
+    Subclasses provide the connection handling (ensure_schema, product_exists,
+    insert_product, query); the read queries are shared SQL.
+    """
+
+    placeholder = "%s"
+
+    @abstractmethod
+    def ensure_schema(self):
+        ...
+
+    @abstractmethod
+    def product_exists(self, company_link):
+        ...
+
+    @abstractmethod
+    def insert_product(self, row):
+        """Insert one products row given as a {column: value} dict."""
+
+    @abstractmethod
+    def query(self, sql, params=()):
+        """Run a read query and return all rows as tuples."""
+
+    def fetch_products(self, filters=None):
+        where, params = build_filters(filters, self.placeholder)
+        rows = self.query(f"SELECT {', '.join(API_COLUMNS)} FROM products{where}", params)
+        return [dict(zip(API_COLUMNS.values(), row)) for row in rows]
+
+    def aggregate(self, group_by, filters=None):
+        """Listing count and price statistics per value of `group_by` (a GROUP_COLUMNS key)."""
+        column = GROUP_COLUMNS[group_by]
+        where, params = build_filters(filters, self.placeholder)
+        rows = self.query(
+            f"""
+            SELECT {column}, COUNT(*), AVG(price_value), MIN(price_value), MAX(price_value)
+            FROM products{where}
+            GROUP BY {column}
+            ORDER BY COUNT(*) DESC
+            """,
+            params
+        )
+        return [
+            {"key": key, "count": count, "avg_price": avg_price, "min_price": min_price, "max_price": max_price}
+            for key, count, avg_price, min_price, max_price in rows
+        ]
+
+    def fetch_page(self, filters=None, sort_by="id", descending=False, cursor=None, offset=0, limit=50, fields=None):
+        """One page of products in keyset order.
+
+        Rows are ordered by (sort column, id); `cursor` is the (sort value, id)
+        pair of the last row of the previous page, so deep pages cost the same
+        as the first. `offset` is only used when no cursor is given, for
+        jumps to arbitrary pages. Returns the rows, the cursor for the next
+        page (None on the last page) and the filtered total.
+        """
+        fields = fields or list(API_COLUMNS.values())
+        columns = {api_name: column for column, api_name in API_COLUMNS.items()}
+        sort_column = SORT_COLUMNS[sort_by]
+        # NULLs would break the row-value comparison, so they sort as the lowest value
+        sort_expr = f"COALESCE({sort_column}, {-1 if sort_column in NUMERIC_COLUMNS else repr('')})"
+        direction = "DESC" if descending else "ASC"
+        ph = self.placeholder
+
+        where, params = build_filters(filters, ph)
+        total = self.query(f"SELECT COUNT(*) FROM products{where}", params)[0][0]
+
+        if cursor is not None:
+            keyset = f"({sort_expr}, id) {'<' if descending else '>'} ({ph}, {ph})"
+            where = f"{where} AND {keyset}" if where else f" WHERE {keyset}"
+            params = [*params, *cursor]
+        sql = f"""
+            SELECT id, {sort_expr}, {', '.join(columns[field] for field in fields)}
+            FROM products{where}
+            ORDER BY {sort_expr} {direction}, id {direction}
+            LIMIT {ph}
+        """
+        params = [*params, limit + 1]  # One extra row tells whether a next page exists
+        if cursor is None and offset:
+            sql += f" OFFSET {ph}"
+            params.append(offset)
+
+        rows = self.query(sql, params)
+        has_next = len(rows) > limit
+        rows = rows[:limit]
+        next_cursor = [rows[-1][1], rows[-1][0]] if has_next else None
+        return {
+            "products": [dict(zip(fields, row[2:])) for row in rows],
+            "next_cursor": next_cursor,
+            "total": total
+        }
+
+    def data_version(self):
+        """Cheap token that changes whenever rows are inserted or rewritten (e.g. by backfill.py)."""
+        count, last_scraped, last_updated = self.query(
+            "SELECT COUNT(*), MAX(scraped_at), MAX(updated_at) FROM products"
+        )[0]
+        return f"{count}:{last_scraped.isoformat() if last_scraped else ''}:{last_updated.isoformat() if last_updated else ''}"
+
+class PostgresBackend(StorageBackend):
+    """The PostgreSQL products table, one connection per call."""
+
+    def __init__(self, db_config=DB_CONFIG):
+        self.db_config = db_config
+
+    def ensure_schema(self):
+        conn = psycopg2.connect(**self.db_config)
+        cursor = conn.cursor()
+
+        for column, column_type in {**NORMALIZED_COLUMNS, **TRACKING_COLUMNS, **PRICE_COLUMNS}.items():
+            cursor.execute(f"ALTER TABLE products ADD COLUMN IF NOT EXISTS {column} {column_type}")
+        for column, default in COLUMN_DEFAULTS.items():
+            cursor.execute(f"ALTER TABLE products ALTER COLUMN {column} SET DEFAULT {default}")
+        conn.commit()
+
+        cursor.close()
+        conn.close()
+
+    def product_exists(self, company_link):
+        conn = psycopg2.connect(**self.db_config)
         cursor = conn.cursor()
 
         query = "SELECT id FROM products WHERE company_path = %s"
         cursor.execute(query, (company_link,))
         result = cursor.fetchone()  # Fetch one result
-        
+
         cursor.close()
         conn.close()
 
         # If result is None, no duplicate exists
         return result is not None
 
+    def insert_product(self, row):
+        conn = psycopg2.connect(**self.db_config)
+        cursor = conn.cursor()
+
+        query = f"INSERT INTO products ({', '.join(row)}) VALUES ({', '.join(['%s'] * len(row))})"
+        cursor.execute(query, tuple(row.values()))
+        conn.commit()
+
+        cursor.close()
+        conn.close()
+
+    def query(self, sql, params=()):
+        conn = psycopg2.connect(**self.db_config)
+        cursor = conn.cursor()
+        cursor.execute(sql, params)
+        rows = cursor.fetchall()
+        cursor.close()
+        conn.close()
+        return rows
+
+_backend = None
+
+def get_backend():
+    """Return the configured storage backend (config.DB_BACKEND), creating it on first use."""
+    global _backend
+    if _backend is None:
+        if DB_BACKEND == "duckdb":
+            from duckdb_backend import DuckDBBackend
+
+            _backend = DuckDBBackend(DUCKDB_PATH)
+        else:
+            _backend = PostgresBackend(DB_CONFIG)
+    return _backend
+
+def set_backend(backend):
+    """Swap the storage backend, e.g. for an in-memory DuckDBBackend in benchmarks."""
+    global _backend
+    _backend = backend
+
+def ensure_schema():
+    """Add the normalized and tracking columns to the products table if they are missing."""
+    try:
+        get_backend().ensure_schema()
+    except Exception as e:
+        logger.error(f"Database Error (ensuring schema): {e}")
+
+def check_duplicate(company_link):
+    """Check if a product with the same companyLink already exists in the database."""
+    try:
+        return get_backend().product_exists(company_link)
     except Exception as e:
         print(f"Database Error (checking duplicate): {e}")
         return False
 
 def store_product_in_db(product):
-    """Store a product entry in the PostgreSQL database if it's not a duplicate."""
+    """Store a product entry in the database if it's not a duplicate.
+
+    Returns the outcome: "stored", "duplicate" or "failed".
+    """
     try:
         # Check if the product already exists based on the companyLink
-        if check_duplicate(product["companyLink"]):
+        with timed("db_duplicate_check"):
+            duplicate = check_duplicate(product["companyLink"])
+        if duplicate:
             logger.info(f"Product already exists in DB: {product['name']}")
-            return  # Skip saving this product
-
-        conn = psycopg2.connect(**DB_CONFIG)
-        cursor = conn.cursor()
+            PRODUCTS.inc(outcome="duplicate")
+            return "duplicate"  # Skip saving this product
 
         # Extract characteristics from details
-        characteristics = process_single_product(product["details"])
-
-        query = """
-        INSERT INTO products (
-            id, company_path, description, price, price_2, currency, discount_percentage, company, type, model,
-            processor_brand, processor, ram, gpu, screen, color, os, storage
-        ) VALUES (
-            %s, %s, %s, %s, %s, %s, %s, %s, %s, %s,%s, %s, %s, %s, %s, %s, %s, %s
-        )
-        """
-        
-        values = (
-            product["link"],
-            product["companyLink"],
-            product["details"],
-            product["price"],  # Extract numeric price
-            None,  # price_2 (Optional, can be added later)
-            "DT",  # Assume currency is TND
-            None,  # discount_percentage (Optional)
-            product["shop"],
-            characteristics.get("type", "N/A"),
-            characteristics.get("model", "N/A"),
-            characteristics.get("processor brand", "N/A"),
-            characteristics.get("processor", "N/A"),
-            characteristics.get("ram", "N/A"),
-            characteristics.get("gpu", "N/A"),
-            characteristics.get("screen", "N/A"),
-            characteristics.get("color", "N/A"),
-            characteristics.get("os", "N/A"),
-            characteristics.get("storage", "N/A")
-        )
+        with timed("extraction"):
+            characteristics = process_single_product(product["details"])
+            normalized = normalize_characteristics(characteristics, product["details"])
 
-        cursor.execute(query, values)
-        conn.commit()
+        row = {
+            "id": product["link"],
+            "company_path": product["companyLink"],
+            "description": product["details"],
+            "price": product["price"],  # Extract numeric price
+            "price_2": None,  # price_2 (Optional, can be added later)
+            "currency": "DT",  # Assume currency is TND
+            "discount_percentage": None,  # discount_percentage (Optional)
+            "company": product["shop"],
+            "type": characteristics.get("type", "N/A"),
+            "model": characteristics.get("model", "N/A"),
+            "processor_brand": characteristics.get("processor brand", "N/A"),
+            "processor": characteristics.get("processor", "N/A"),
+            "ram": characteristics.get("ram", "N/A"),
+            "gpu": characteristics.get("gpu", "N/A"),
+            "screen": characteristics.get("screen", "N/A"),
+            "color": characteristics.get("color", "N/A"),
+            "os": characteristics.get("os", "N/A"),
+            "storage": characteristics.get("storage", "N/A"),
+            **{column: normalized[column] for column in NORMALIZED_COLUMNS},
+            "price_value": parse_price(product["price"]),
+            "extraction_version": EXTRACTION_VERSION
+        }
 
-        logger.info(f"Stored in DB: {product['name']}")
+        with timed("db_write"):
+            get_backend().insert_product(row)
 
-        cursor.close()
-        conn.close()
+        PRODUCTS.inc(outcome="stored")
+        logger.info(f"Stored in DB: {product['name']}")
+        return "stored"
     except Exception as e:
+        PRODUCTS.inc(outcome="failed")
         logger.error(f"Database Error: {e}")
+        return "failed"
 
-# Add this to database.py
-
-def get_all_products():
-    """Fetch all products from the database."""
+def get_all_products(filters=None):
+    """Fetch all products from the database, optionally filtered (see build_filters)."""
     try:
-        conn = psycopg2.connect(**DB_CONFIG)
-        cursor = conn.cursor()
+        return get_backend().fetch_products(filters)
+    except Exception as e:
+        logger.error(f"Error fetching products: {e}")
+        raise
 
-        query = """
-        SELECT 
-            id, company_path, description, price, company, type, model, 
-            processor_brand, processor, ram, gpu, screen, color, os, storage
-        FROM products
-        """
-        cursor.execute(query)
-        products = cursor.fetchall()
-
-        # Convert tuples to dictionaries for JSON serialization
-        product_list = []
-        for product in products:
-            product_dict = {
-                "id": product[0],
-                "company_link": product[1],
-                "description": product[2],
-                "price": product[3],
-                "shop": product[4],
-                "type": product[5],
-                "model": product[6],
-                "processor_brand": product[7],
-                "processor": product[8],
-                "ram": product[9],
-                "gpu": product[10],
-                "screen": product[11],
-                "color": product[12],
-                "os": product[13],
-                "storage": product[14]
-            }
-            product_list.append(product_dict)
+def get_aggregates(group_by, filters=None):
+    """Listing count and price statistics grouped by a GROUP_COLUMNS field."""
+    try:
+        return get_backend().aggregate(group_by, filters)
+    except Exception as e:
+        logger.error(f"Error aggregating products: {e}")
+        raise
 
-        cursor.close()
-        conn.close()
-        return product_list
+def get_data_version():
+    """Token identifying the current contents of the products table."""
+    try:
+        return get_backend().data_version()
+    except Exception as e:
+        logger.error(f"Error reading data version: {e}")
+        raise
 
+def get_products_page(filters=None, sort_by="id", descending=False, cursor=None, offset=0, limit=50, fields=None):
+    """Keyset-paginated products (see StorageBackend.fetch_page)."""
+    try:
+        return get_backend().fetch_page(filters, sort_by, descending, cursor, offset, limit, fields)
     except Exception as e:
-        logger.error(f"Error fetching products: {e}")
-        raise
\ No newline at end of file
+        logger.error(f"Error fetching products page: {e}")
+        raise
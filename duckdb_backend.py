@@ -0,0 +1,82 @@
+import logging
+import os
+import threading
+import duckdb
+from database import StorageBackend, API_COLUMNS, NORMALIZED_COLUMNS, TRACKING_COLUMNS, PRICE_COLUMNS, COLUMN_DEFAULTS
+
+logger = logging.getLogger(__name__)
+
+# Text columns of the Postgres products table, in its column order
+TEXT_COLUMNS = [
+    "id", "company_path", "description", "price", "price_2", "currency", "discount_percentage", "company",
+    "type", "model", "processor_brand", "processor", "ram", "gpu", "screen", "color", "os", "storage"
+]
+
+class DuckDBBackend(StorageBackend):
+    """Embedded, columnar products store for analytical scans.
+
+    Mirrors the Postgres products table in a single DuckDB file (or in memory
+    with path=":memory:"), so the /products filters and the dashboard's
+    aggregates run without a database server. Rows come either from the scrape
+    stream through insert_product or from export.py snapshots via load_parquet.
+    """
+
+    placeholder = "?"
+
+    def __init__(self, path=":memory:"):
+        self.path = path
+        self._conn = duckdb.connect(path)
+        self._lock = threading.Lock()  # One writer at a time; readers use their own cursors
+        self.ensure_schema()
+
+    def ensure_schema(self):
+        columns = [f"{column} TEXT" + (" PRIMARY KEY" if column == "id" else "") for column in TEXT_COLUMNS]
+        columns += [f"{column} {column_type}" + (f" DEFAULT {COLUMN_DEFAULTS[column]}" if column in COLUMN_DEFAULTS else "")
+                    for column, column_type in {**NORMALIZED_COLUMNS, **TRACKING_COLUMNS, **PRICE_COLUMNS}.items()]
+        with self._lock:
+            self._conn.execute(f"CREATE TABLE IF NOT EXISTS products ({', '.join(columns)})")
+
+    def product_exists(self, company_link):
+        cursor = self._conn.cursor()
+        try:
+            row = cursor.execute("SELECT id FROM products WHERE company_path = ? LIMIT 1", [company_link]).fetchone()
+        finally:
+            cursor.close()
+        return row is not None
+
+    def insert_product(self, row):
+        query = f"INSERT INTO products ({', '.join(row)}) VALUES ({', '.join(['?'] * len(row))})"
+        with self._lock:
+            self._conn.execute(query, list(row.values()))
+
+    def query(self, sql, params=()):
+        cursor = self._conn.cursor()
+        try:
+            return cursor.execute(sql, list(params)).fetchall()
+        finally:
+            cursor.close()
+
+    def load_parquet(self, snapshot_dir):
+        """Insert products from an export.py snapshot (the `products` dataset), skipping ids already present."""
+        pattern = os.path.join(snapshot_dir, "products", "**", "*.parquet")
+        selected = {
+            column: "CAST(price AS TEXT)" if column == "price" else api_name
+            for column, api_name in API_COLUMNS.items()
+        }
+        selected["price_value"] = "price"
+        selected["scraped_at"] = "scraped_at"
+        query = f"""
+            INSERT INTO products ({', '.join(selected)})
+            SELECT {', '.join(selected.values())}
+            FROM read_parquet(?, hive_partitioning = true)
+            WHERE id NOT IN (SELECT id FROM products)
+        """
+        with self._lock:
+            before = self._conn.execute("SELECT COUNT(*) FROM products").fetchone()[0]
+            self._conn.execute(query, [pattern])
+            after = self._conn.execute("SELECT COUNT(*) FROM products").fetchone()[0]
+        logger.info(f"Loaded {after - before} products from {snapshot_dir}")
+        return after - before
+
+    def close(self):
+        self._conn.close()
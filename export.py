@@ -0,0 +1,260 @@
+import argparse
+import json
+import logging
+import os
+import uuid
+from datetime import datetime
+import psycopg2
+import pyarrow as pa
+import pyarrow.dataset as ds
+from config import DB_CONFIG, EXPORT_DIR, EXPORT_BATCH_SIZE
+from database import NORMALIZED_COLUMNS
+from normalizer import parse_price
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+STATE_FILE = "_export_state.json"
+PARTITIONING = ds.partitioning(pa.schema([("scrape_date", pa.string()), ("shop", pa.string())]), flavor="hive")
+
+ARROW_TYPES = {"REAL": pa.float64(), "SMALLINT": pa.int16(), "TEXT": pa.string()}
+
+# products column -> exported column, using the same names as the /products API
+PRODUCT_COLUMNS = {
+    "id": ("id", pa.string()),
+    "company_path": ("company_link", pa.string()),
+    "description": ("description", pa.string()),
+    "price": ("price", pa.float64()),
+    "company": ("shop", pa.string()),
+    "type": ("type", pa.string()),
+    "model": ("model", pa.string()),
+    "processor_brand": ("processor_brand", pa.string()),
+    "processor": ("processor", pa.string()),
+    "ram": ("ram", pa.string()),
+    "gpu": ("gpu", pa.string()),
+    "screen": ("screen", pa.string()),
+    "color": ("color", pa.string()),
+    "os": ("os", pa.string()),
+    "storage": ("storage", pa.string()),
+    **{column: (column, ARROW_TYPES[column_type]) for column, column_type in NORMALIZED_COLUMNS.items()},
+    "scraped_at": ("scraped_at", pa.timestamp("us"))
+}
+
+PRICE_HISTORY_TIME_COLUMNS = ("recorded_at", "scraped_at", "created_at", "updated_at")
+
+# information_schema data_type -> Arrow type for price_history; other types are exported as strings
+PG_ARROW_TYPES = {
+    "smallint": pa.int16(),
+    "integer": pa.int32(),
+    "bigint": pa.int64(),
+    "real": pa.float64(),
+    "double precision": pa.float64(),
+    "numeric": pa.float64(),
+    "boolean": pa.bool_(),
+    "date": pa.date32(),
+    "timestamp without time zone": pa.timestamp("us"),
+    "timestamp with time zone": pa.timestamp("us", tz="UTC"),
+    "text": pa.string(),
+    "character varying": pa.string()
+}
+
+def load_state(output_dir):
+    path = os.path.join(output_dir, STATE_FILE)
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as file:
+        return json.load(file)
+
+def save_state(output_dir, state):
+    path = os.path.join(output_dir, STATE_FILE)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as file:
+        json.dump(state, file, indent=2)
+    os.replace(tmp_path, path)
+
+def _write_partitioned(table, base_dir, run_id, batch_number):
+    ds.write_dataset(
+        table,
+        base_dir,
+        format="parquet",
+        partitioning=PARTITIONING,
+        # Unique per run and batch so appends never overwrite earlier files
+        basename_template=f"part-{run_id}-{batch_number:05d}-{{i}}.parquet",
+        existing_data_behavior="overwrite_or_ignore"
+    )
+
+def export_products(conn, output_dir, state, run_id, batch_size=EXPORT_BATCH_SIZE):
+    """Append products scraped after the last export watermark to the products dataset."""
+    watermark = state.get("products", {})
+    after_time = watermark.get("scraped_at", "-infinity")
+    after_id = watermark.get("id", "")
+
+    schema = pa.schema(list(PRODUCT_COLUMNS.values()) + [("scrape_date", pa.string())])
+    cursor = conn.cursor(name=f"export_products_{run_id}")  # Server-side cursor streams the result
+    cursor.itersize = batch_size
+    # Rows from before scraped_at existed have it NULL: they sort first and go to the "unknown" partition
+    cursor.execute(
+        f"""
+        SELECT {", ".join(PRODUCT_COLUMNS)}
+        FROM products
+        WHERE (COALESCE(scraped_at, '-infinity'::timestamp), id) > (%s::timestamp, %s)
+        ORDER BY COALESCE(scraped_at, '-infinity'::timestamp), id
+        """,
+        (after_time, after_id)
+    )
+
+    exported = 0
+    batch_number = 0
+    price_index = list(PRODUCT_COLUMNS).index("price")
+    shop_index = list(PRODUCT_COLUMNS).index("company")
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            break
+        columns = [list(values) for values in zip(*rows)]
+        columns[price_index] = [parse_price(value) for value in columns[price_index]]
+        scraped_at = columns[-1]
+        columns.append([value.date().isoformat() if value else "unknown" for value in scraped_at])
+        columns[shop_index] = [value or "unknown" for value in columns[shop_index]]
+
+        _write_partitioned(pa.Table.from_arrays(columns, schema=schema), os.path.join(output_dir, "products"),
+                           run_id, batch_number)
+        batch_number += 1
+        exported += len(rows)
+        last = rows[-1]
+        state["products"] = {"scraped_at": last[-1].isoformat() if last[-1] else "-infinity", "id": last[0]}
+        save_state(output_dir, state)  # Files for this batch are on disk, so move the watermark past them
+
+    cursor.close()
+    return exported
+
+def export_price_history(conn, output_dir, state, run_id, batch_size=EXPORT_BATCH_SIZE):
+    """Append new price_history rows, if that table exists, partitioned the same way as products."""
+    cursor = conn.cursor()
+    cursor.execute(
+        "SELECT column_name, data_type FROM information_schema.columns "
+        "WHERE table_name = 'price_history' ORDER BY ordinal_position"
+    )
+    types = dict(cursor.fetchall())
+    cursor.execute(
+        """
+        SELECT kcu.column_name
+        FROM information_schema.table_constraints tc
+        JOIN information_schema.key_column_usage kcu
+          ON kcu.constraint_name = tc.constraint_name AND kcu.table_name = tc.table_name
+        WHERE tc.table_name = 'price_history' AND tc.constraint_type = 'PRIMARY KEY'
+        """
+    )
+    primary_key = [row[0] for row in cursor.fetchall()]
+    cursor.close()
+    columns = list(types)
+    if not columns:
+        return 0
+
+    time_column = next((column for column in PRICE_HISTORY_TIME_COLUMNS if column in columns), None)
+    if time_column is None:
+        logger.warning(f"price_history has none of {PRICE_HISTORY_TIME_COLUMNS}; skipping its export")
+        return 0
+    shop_column = next((column for column in ("shop", "company") if column in columns), None)
+    # Keyset (time, key) like export_products, so rows sharing the watermark's timestamp are not skipped;
+    # without a single-column primary key the physical row id stands in
+    key = primary_key[0] if len(primary_key) == 1 else "ctid"
+    key_param = "%s::tid" if key == "ctid" else "%s"
+    time_expr = f"COALESCE({time_column}, '-infinity'::timestamp)"
+
+    # Pinned so a batch where a column is all NULL does not write a null-typed column
+    arrow_types = {column: PG_ARROW_TYPES.get(data_type, pa.string()) for column, data_type in types.items()}
+    if "price" in arrow_types:
+        arrow_types["price"] = pa.float64()  # Through parse_price
+    arrow_types.update({"scrape_date": pa.string(), "shop": pa.string()})
+    schema = pa.schema(list(arrow_types.items()))
+    as_text = [column for column in columns if types[column] not in PG_ARROW_TYPES]
+    as_float = [column for column in columns if types[column] == "numeric" and column != "price"]
+
+    watermark = state.get("price_history", {})
+    where, params = "", ()
+    if "key" in watermark:
+        where = f"WHERE ({time_expr}, {key}) > (%s::timestamp, {key_param})"
+        params = (watermark[time_column], watermark["key"])
+    elif time_column in watermark:
+        # Watermark written before the keyset: re-read its timestamp rather than skip rows sharing it
+        where = f"WHERE {time_expr} >= %s::timestamp"
+        params = (watermark[time_column],)
+
+    cursor = conn.cursor(name=f"export_price_history_{run_id}")
+    cursor.itersize = batch_size
+    cursor.execute(
+        f"SELECT {', '.join(columns)}{', ctid' if key == 'ctid' else ''} FROM price_history {where} "
+        f"ORDER BY {time_expr}, {key}",
+        params
+    )
+
+    exported = 0
+    batch_number = 0
+    time_index = columns.index(time_column)
+    key_index = len(columns) if key == "ctid" else columns.index(key)
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            break
+        data = {column: list(values) for column, values in zip(columns, zip(*rows))}
+        data["scrape_date"] = [value.date().isoformat() if value else "unknown" for value in data[time_column]]
+        data["shop"] = [value or "unknown" for value in data[shop_column]] if shop_column else ["unknown"] * len(rows)
+        if "price" in data:
+            data["price"] = [parse_price(value) for value in data["price"]]
+        for column in as_text:
+            data[column] = [None if value is None else str(value) for value in data[column]]
+        for column in as_float:
+            data[column] = [None if value is None else float(value) for value in data[column]]
+
+        _write_partitioned(pa.Table.from_pydict(data, schema=schema), os.path.join(output_dir, "price_history"),
+                           run_id, batch_number)
+        batch_number += 1
+        exported += len(rows)
+        last = rows[-1]
+        state["price_history"] = {
+            time_column: last[time_index].isoformat() if last[time_index] else "-infinity",
+            "key": last[key_index]
+        }
+        save_state(output_dir, state)
+
+    cursor.close()
+    return exported
+
+def export_snapshot(output_dir=EXPORT_DIR, batch_size=EXPORT_BATCH_SIZE, full=False):
+    """Export products (and price_history when present) as Parquet datasets partitioned by scrape_date/shop.
+
+    Only rows newer than the watermark stored in `output_dir` are appended, unless `full` is set.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    state = {} if full else load_state(output_dir)
+    run_id = f"{datetime.now():%Y%m%d%H%M%S}-{uuid.uuid4().hex[:8]}"
+
+    conn = psycopg2.connect(**DB_CONFIG)
+    try:
+        products = export_products(conn, output_dir, state, run_id, batch_size)
+        history = export_price_history(conn, output_dir, state, run_id, batch_size)
+    finally:
+        conn.close()
+
+    save_state(output_dir, state)
+    logger.info(f"Exported {products} products and {history} price history rows to {output_dir}")
+    return products, history
+
+def load_snapshot(output_dir=EXPORT_DIR, dataset="products", columns=None, filters=None):
+    """Read an exported dataset with column pruning and predicate pushdown.
+
+    e.g. load_snapshot(columns=["price", "os_name"], filters=[("shop", "=", "mediavision")])
+    only reads the mediavision partitions and the two requested columns.
+    """
+    import pandas as pd
+
+    return pd.read_parquet(os.path.join(output_dir, dataset), columns=columns, filters=filters)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export products as partitioned Parquet snapshots.")
+    parser.add_argument("--output", default=EXPORT_DIR)
+    parser.add_argument("--batch-size", type=int, default=EXPORT_BATCH_SIZE)
+    parser.add_argument("--full", action="store_true", help="Ignore the watermark and export every row (use a fresh --output)")
+    args = parser.parse_args()
+    export_snapshot(args.output, args.batch_size, args.full)
@@ -1,5 +1,18 @@
+import os
 import re
+import json
+import hashlib
+import logging
+import sqlite3
+import tempfile
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
 import pandas as pd
+from config import EXTRACT_CHUNKSIZE, EXTRACT_WORKERS, EXTRACTION_CACHE_SIZE, EXTRACTION_CACHE_PATH
+from metrics import EXTRACTION_CACHE, timed
+
+logger = logging.getLogger(__name__)
 
 # Precompiled regex patterns
 PATTERNS = {
@@ -15,6 +28,11 @@ PATTERNS = {
     'OS': re.compile(r'(Windows\s*\d+\s*(Pro|Home|Enterprise)?)|macOS|Linux|Ubuntu|FreeDOS|ChromeOS', re.IGNORECASE)
 }
 
+# Changes whenever a pattern or its flags change, so cached results from older patterns are never reused
+PATTERNS_VERSION = hashlib.sha1(
+    "\n".join(f"{key}:{pattern.pattern}:{pattern.flags}" for key, pattern in PATTERNS.items()).encode("utf-8")
+).hexdigest()[:16]
+
 def extract_characteristics(text):
     """Extract structured product characteristics from text."""
     characteristics = {key.lower(): None for key in PATTERNS}  # Use lowercase keys
@@ -27,7 +45,7 @@ def extract_characteristics(text):
         if match:
             characteristics[key.lower()] = match.group(0).strip()
         else:
-            print(f"Pattern not matched for {key}: {text}")  # Debugging line
+            logger.debug(f"Pattern not matched for {key}: {text}")
 
     # Default to "PC Portable" if Type is missing
     if not characteristics['type']:
@@ -35,10 +53,113 @@ def extract_characteristics(text):
 
     return characteristics
 
+class ExtractionCache:
+    """Memoizes extract_characteristics by a hash of the details text.
+
+    Results live in a bounded in-memory LRU and, when `path` is set, in a SQLite
+    store shared across runs. Persistent entries are tagged with PATTERNS_VERSION;
+    entries written under another version are dropped when the store is opened.
+    """
+
+    def __init__(self, maxsize=EXTRACTION_CACHE_SIZE, path=EXTRACTION_CACHE_PATH):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = None
+        if path:
+            self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS extractions ("
+                "version TEXT NOT NULL, digest TEXT NOT NULL, result TEXT NOT NULL, "
+                "PRIMARY KEY (version, digest))"
+            )
+            self._conn.execute("DELETE FROM extractions WHERE version != ?", (PATTERNS_VERSION,))
+            self._conn.commit()
+
+    @staticmethod
+    def digest(text):
+        """Content hash used as the cache key."""
+        return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+
+    def get(self, text):
+        """Return the characteristics for `text`, extracting them only on a cache miss."""
+        if not isinstance(text, str) or not text.strip():
+            return extract_characteristics(text)
+
+        key = self.digest(text)
+        with self._lock:
+            result = self._entries.get(key)
+            if result is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                EXTRACTION_CACHE.inc(result="hit")
+                return dict(result)
+
+            if self._conn is not None:
+                row = self._conn.execute(
+                    "SELECT result FROM extractions WHERE version = ? AND digest = ?",
+                    (PATTERNS_VERSION, key)
+                ).fetchone()
+                if row is not None:
+                    result = json.loads(row[0])
+                    self._remember(key, result)
+                    self.hits += 1
+                    EXTRACTION_CACHE.inc(result="persistent_hit")
+                    return dict(result)
+
+        with timed("regex_extraction"):
+            result = extract_characteristics(text)
+        EXTRACTION_CACHE.inc(result="miss")
+        with self._lock:
+            self.misses += 1
+            self._remember(key, result)
+            if self._conn is not None:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO extractions (version, digest, result) VALUES (?, ?, ?)",
+                    (PATTERNS_VERSION, key, json.dumps(result))
+                )
+                self._conn.commit()
+        return dict(result)
+
+    def _remember(self, key, result):
+        self._entries[key] = dict(result)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        """Drop every cached entry, in memory and on disk."""
+        with self._lock:
+            self._entries.clear()
+            if self._conn is not None:
+                self._conn.execute("DELETE FROM extractions")
+                self._conn.commit()
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+_cache = None
+
+def get_extraction_cache():
+    """Return the process-wide ExtractionCache, creating it on first use."""
+    global _cache
+    if _cache is None:
+        _cache = ExtractionCache()
+    return _cache
+
+def cached_extract_characteristics(text):
+    """Memoized drop-in for extract_characteristics."""
+    return get_extraction_cache().get(text)
+
 def process_single_product(product_details):
     """Extract characteristics for a single product and return the processed data."""
-    # Extract characteristics using the extractor function
-    product_characteristics = extract_characteristics(product_details)
+    # Extract characteristics using the memoized extractor
+    product_characteristics = cached_extract_characteristics(product_details)
     
     # Optionally, convert it into a pandas DataFrame if you plan to save it
     # processed_df = pd.DataFrame([product_characteristics])
@@ -57,3 +178,83 @@ def process_extracted_data(filename):
     
     df_final.to_csv(filename, index=False)
     print(f"Processed data saved as {filename}")
+
+def _extract_chunk(details):
+    """Extract characteristics for a list of details strings (runs in a worker process)."""
+    return [cached_extract_characteristics(text) for text in details]
+
+def _default_output(filename):
+    """Build the default output path for a streaming run, e.g. data.csv -> data_processed.csv."""
+    root, ext = os.path.splitext(filename)
+    return f"{root}_processed{ext or '.csv'}"
+
+def _open_output(path, fmt):
+    """Open `path` for _write_chunk: binary for Parquet, text for CSV."""
+    if fmt == "parquet":
+        return open(path, "wb")
+    return open(path, "w", newline="", encoding="utf-8")
+
+def _write_chunk(df_final, handle, fmt, state):
+    """Append one processed chunk to the open CSV handle or Parquet writer."""
+    if fmt == "parquet":
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        if state.get("schema") is None:
+            # Input columns are read as str and extracted values are str or None, so pin every
+            # column to string rather than letting an all-empty first chunk infer a null type
+            state["schema"] = pa.schema([(column, pa.string()) for column in df_final.columns])
+            state["writer"] = pq.ParquetWriter(handle, state["schema"])
+        table = pa.Table.from_pandas(df_final, schema=state["schema"], preserve_index=False)
+        state["writer"].write_table(table)
+    else:
+        df_final.to_csv(handle, header=not state.get("header_written"), index=False)
+        state["header_written"] = True
+
+def process_extracted_data_streaming(filename, output=None, chunksize=EXTRACT_CHUNKSIZE, workers=EXTRACT_WORKERS, fmt=None):
+    """Extract characteristics from a large CSV in chunks, fanned out over a process pool.
+
+    Chunks are written in input order to a temporary file next to `output`, which
+    is atomically swapped in once the whole input has been processed. At most
+    `2 * workers` chunks are in flight, so memory stays bounded by the chunk size.
+    `fmt` is "csv" or "parquet"; by default it is inferred from `output`.
+    """
+    output = output or _default_output(filename)
+    fmt = fmt or ("parquet" if output.endswith(".parquet") else "csv")
+    workers = workers or os.cpu_count() or 1
+    max_pending = workers * 2
+
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(output)), suffix=".tmp")
+    os.close(fd)
+    state = {}
+    rows = 0
+
+    try:
+        with _open_output(tmp_path, fmt) as handle, ProcessPoolExecutor(max_workers=workers) as pool:
+            pending = deque()
+
+            def drain_one():
+                chunk, future = pending.popleft()
+                characteristics_df = pd.DataFrame(future.result(), index=chunk.index)
+                _write_chunk(pd.concat([chunk, characteristics_df], axis=1), handle, fmt, state)
+                return len(chunk)
+
+            reader = pd.read_csv(filename, chunksize=chunksize, dtype=str, keep_default_na=False)
+            for chunk in reader:
+                pending.append((chunk, pool.submit(_extract_chunk, chunk['details'].tolist())))
+                if len(pending) >= max_pending:
+                    rows += drain_one()
+            while pending:
+                rows += drain_one()
+
+            if state.get("writer") is not None:
+                state["writer"].close()
+
+        os.replace(tmp_path, output)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    print(f"Processed {rows} rows saved as {output}")
+    return output
@@ -1,7 +1,20 @@
-from fastapi import FastAPI, HTTPException
+import base64
+import json
+import math
+import time
+from contextlib import nullcontext
+from typing import List, Optional
+from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, PlainTextResponse
 import logging
+from config import LOG_LEVEL, PROFILE_REQUESTS
+from metrics import REGISTRY, HTTP_REQUESTS, HTTP_SECONDS, profiled, timed
 from scraper import scrape
-from database import get_all_products 
+from database import (
+    get_all_products, get_products_page, get_aggregates, get_data_version, ensure_schema,
+    API_COLUMNS, GROUP_COLUMNS, SORT_COLUMNS, COLUMN_OPERATORS, NUMERIC_COLUMNS
+)
 from fastapi.middleware.cors import CORSMiddleware
 
 # Initialize FastAPI app
@@ -16,17 +29,46 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Set up logging to capture more details
-logging.basicConfig(level=logging.DEBUG)
+# Set up logging; raise to DEBUG in config.py only while investigating.
+# force=True: database.py and scraper.py, imported above, have already configured the root logger
+logging.basicConfig(level=LOG_LEVEL, force=True)
 logger = logging.getLogger(__name__)
 
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        # Route templates (not raw paths) keep the label set small
+        route = request.scope.get("route")
+        path = route.path if route is not None else "unmatched"
+        HTTP_SECONDS.observe(time.perf_counter() - start, method=request.method, route=path)
+        HTTP_REQUESTS.inc(method=request.method, route=path, status=status)
+
+def _profiling(profile, name):
+    """Profile the request when asked to and PROFILE_REQUESTS allows it."""
+    return profiled(name) if profile and PROFILE_REQUESTS else nullcontext()
+
+def _respond(payload):
+    """Serialize like FastAPI's default response, timed separately from the query."""
+    with timed("api_serialize"):
+        return JSONResponse(jsonable_encoder(payload))
+
+@app.on_event("startup")
+def prepare_database():
+    ensure_schema()  # Make sure the normalized columns exist before the first insert
+
 @app.post("/scrape")
-async def scrape_product():
+async def scrape_product(profile: bool = False):
     try:
         logger.info("Starting scraping process...")
         
         # Call your scraping function here
-        await scrape()  # Assuming `scrape()` is the function responsible for scraping
+        await scrape(profile=profile)  # Assuming `scrape()` is the function responsible for scraping
         
         logger.info("Scraping completed successfully.")
         return {"message": "Scraping process completed."}
@@ -36,14 +78,107 @@ async def scrape_product():
         raise HTTPException(status_code=500, detail=str(e))  # Return a detailed error message
 
 
+def _filters(min_price, max_price, shop, q, column_filters=None):
+    columns = []
+    for column_filter in column_filters or []:
+        # Each filter is "field|operator|value", e.g. "ram_gb|>=|16"
+        field, operator, value = (column_filter.split("|", 2) + ["", ""])[:3]
+        if field not in SORT_COLUMNS or operator not in COLUMN_OPERATORS:
+            raise HTTPException(status_code=400, detail=f"Invalid filter: {column_filter}")
+        if operator != "contains" and SORT_COLUMNS[field] in NUMERIC_COLUMNS:
+            try:
+                value = float(value)
+            except ValueError:
+                value = math.nan
+            if not math.isfinite(value):
+                raise HTTPException(status_code=400, detail=f"Invalid number in filter: {column_filter}")
+        columns.append((field, operator, value))
+    return {"min_price": min_price, "max_price": max_price, "shops": shop, "keyword": q, "columns": columns}
+
+def _encode_cursor(cursor):
+    return base64.urlsafe_b64encode(json.dumps(cursor).encode()).decode() if cursor else None
+
+def _decode_cursor(cursor, sort_by):
+    if not cursor:
+        return None
+    try:
+        decoded = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    # A cursor is the [sort value, id] pair of the last row of a page sorted by `sort_by`
+    numeric = SORT_COLUMNS[sort_by] in NUMERIC_COLUMNS
+    if (not isinstance(decoded, list) or len(decoded) != 2 or not isinstance(decoded[1], str)
+            or isinstance(decoded[0], bool)
+            or not isinstance(decoded[0], (int, float) if numeric else str)):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return decoded
+
 @app.get("/products")
-def get_products():
+def get_products(
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    shop: Optional[List[str]] = Query(None),
+    q: Optional[str] = None,
+    filter: Optional[List[str]] = Query(None),
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    offset: int = Query(0, ge=0),
+    sort_by: str = "id",
+    order: str = "asc",
+    fields: Optional[List[str]] = Query(None),
+    profile: bool = False
+):
+    # Without `limit` the whole (filtered) table is returned, as before
+    filters = _filters(min_price, max_price, shop, q, filter)
+    if sort_by not in SORT_COLUMNS or order not in ("asc", "desc"):
+        raise HTTPException(status_code=400, detail="Invalid sort_by or order")
+    if fields and any(field not in API_COLUMNS.values() for field in fields):
+        raise HTTPException(status_code=400, detail="Invalid fields")
+    page_cursor = _decode_cursor(cursor, sort_by)
     try:
-        products = get_all_products()  # Fetch products from DB
-        return {"products": products}
+        with _profiling(profile, "products"):
+            if limit is None:
+                with timed("api_query"):
+                    products = get_all_products(filters)  # Fetch products from DB
+                return _respond({"products": products})
+            with timed("api_query"):
+                page = get_products_page(filters, sort_by, order == "desc", page_cursor, offset, limit, fields)
+            page["next_cursor"] = _encode_cursor(page["next_cursor"])
+            return _respond(page)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/products/version")
+def get_products_version():
+    # Lets clients such as the dashboard skip re-downloading /products when nothing changed
+    try:
+        return {"version": get_data_version()}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/products/aggregates")
+def get_product_aggregates(
+    group_by: str,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    shop: Optional[List[str]] = Query(None),
+    q: Optional[str] = None
+):
+    if group_by not in GROUP_COLUMNS:
+        raise HTTPException(status_code=400, detail=f"group_by must be one of {', '.join(GROUP_COLUMNS)}")
+    filters = _filters(min_price, max_price, shop, q)
+    try:
+        with timed("api_query"):
+            aggregates = get_aggregates(group_by, filters)
+        return _respond({"aggregates": aggregates})
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/metrics")
+def get_metrics():
+    # Prometheus text exposition of the counters and histograms in metrics.py
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -0,0 +1,221 @@
+import asyncio
+import cProfile
+import io
+import logging
+import os
+import pstats
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from datetime import datetime
+from functools import wraps
+from config import PROFILE_DIR
+
+logger = logging.getLogger(__name__)
+
+# Seconds; covers regex extraction (sub-millisecond) up to page loads (tens of seconds)
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+def _format_labels(labelnames, values, extra=()):
+    pairs = list(zip(labelnames, values)) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n") for _, value in pairs)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+class Counter:
+    """Monotonic counter, one value per label combination."""
+
+    type = "counter"
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(tuple(str(labels.get(name, "")) for name in self.labelnames), 0)
+
+    def samples(self):
+        with self._lock:
+            values = dict(self._values)
+        for key, value in sorted(values.items()):
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {value}"
+
+class Histogram:
+    """Cumulative-bucket histogram with sum and count, one set per label combination."""
+
+    type = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}  # label values -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * (len(self.buckets) + 2)
+            if index < len(self.buckets):
+                series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def snapshot(self, **labels):
+        """(sum, count) for one label combination."""
+        series = self._series.get(tuple(str(labels.get(name, "")) for name in self.labelnames))
+        return (series[-2], series[-1]) if series else (0.0, 0)
+
+    def samples(self):
+        with self._lock:
+            series = {key: list(values) for key, values in self._series.items()}
+        for key, values in sorted(series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, values):
+                cumulative += count
+                yield f"{self.name}_bucket{_format_labels(self.labelnames, key, [('le', bound)])} {cumulative}"
+            yield f"{self.name}_bucket{_format_labels(self.labelnames, key, [('le', '+Inf')])} {values[-1]}"
+            yield f"{self.name}_sum{_format_labels(self.labelnames, key)} {values[-2]}"
+            yield f"{self.name}_count{_format_labels(self.labelnames, key)} {values[-1]}"
+
+class Registry:
+    """Process-wide set of metrics, rendered in the Prometheus text format by /metrics."""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric):
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing  # Re-imported module: keep the series collected so far
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self):
+        lines = []
+        with self._lock:
+            metrics = list(self._metrics.values())
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+REGISTRY = Registry()
+
+STAGE_SECONDS = REGISTRY.histogram(
+    "barbechli_stage_seconds", "Wall time spent in each pipeline stage", ("stage",)
+)
+STAGE_ERRORS = REGISTRY.counter(
+    "barbechli_stage_errors_total", "Pipeline stages that ended with an exception", ("stage",)
+)
+PRODUCTS = REGISTRY.counter(
+    "barbechli_products_total", "Products handled by the scraper, by outcome", ("outcome",)
+)
+EXTRACTION_CACHE = REGISTRY.counter(
+    "barbechli_extraction_cache_total", "Extraction cache lookups, by result", ("result",)
+)
+HTTP_REQUESTS = REGISTRY.counter(
+    "barbechli_http_requests_total", "API requests served", ("method", "route", "status")
+)
+HTTP_SECONDS = REGISTRY.histogram(
+    "barbechli_http_request_seconds", "API request latency, from receipt to response", ("method", "route")
+)
+
+class timed:
+    """Record the wall time of a block or function in STAGE_SECONDS under `stage`.
+
+    Usable as `with timed("db_write"):` or as a decorator on plain and async functions.
+    Exceptions are counted in STAGE_ERRORS and re-raised.
+    """
+
+    def __init__(self, stage):
+        self.stage = stage
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        STAGE_SECONDS.observe(time.perf_counter() - self._start, stage=self.stage)
+        if exc_type is not None:
+            STAGE_ERRORS.inc(stage=self.stage)
+        return False
+
+    def __call__(self, function):
+        if asyncio.iscoroutinefunction(function):
+            @wraps(function)
+            async def async_wrapper(*args, **kwargs):
+                with timed(self.stage):
+                    return await function(*args, **kwargs)
+            return async_wrapper
+
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            with timed(self.stage):
+                return function(*args, **kwargs)
+        return wrapper
+
+@contextmanager
+def profiled(name, output_dir=PROFILE_DIR):
+    """Profile the block and write a report to `output_dir`.
+
+    Uses pyinstrument's sampling profiler (HTML report, async-aware; listed in
+    requirements.txt). Without it, falls back to the deterministic cProfile
+    (.prof file, loadable with pstats or snakeviz), which adds overhead to every
+    call. Only the calling thread is profiled. Yields the report path.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    base = os.path.join(output_dir, f"{name}-{datetime.now():%Y%m%d-%H%M%S-%f}")
+    try:
+        from pyinstrument import Profiler
+    except ImportError:
+        Profiler = None
+        logger.warning("pyinstrument is not installed; profiling with cProfile instead")
+
+    if Profiler is not None:
+        profiler = Profiler(async_mode="enabled")
+        path = f"{base}.html"
+        profiler.start()
+        try:
+            yield path
+        finally:
+            profiler.stop()
+            with open(path, "w", encoding="utf-8") as file:
+                file.write(profiler.output_html())
+            logger.info(f"Profile of {name} written to {path}")
+        return
+
+    profiler = cProfile.Profile()
+    path = f"{base}.prof"
+    profiler.enable()
+    try:
+        yield path
+    finally:
+        profiler.disable()
+        profiler.dump_stats(path)
+        summary = io.StringIO()
+        pstats.Stats(profiler, stream=summary).sort_stats("cumulative").print_stats(15)
+        logger.info(f"Profile of {name} written to {path}\n{summary.getvalue()}")
@@ -0,0 +1,148 @@
+import re
+
+# Bump whenever the rules below change, so stored values can be recomputed
+NORMALIZATION_VERSION = 2
+
+NUMBER = re.compile(r'(\d+(?:[.,]\d+)?)')
+STORAGE_SIZE = re.compile(r'(\d+(?:[.,]\d+)?)\s*(Go|GB|To|TB)', re.IGNORECASE)
+INTEL_MODEL = re.compile(r'\bi[3579]\s*-?\s*(\d{4,5})[A-Z]*\b', re.IGNORECASE)
+RYZEN_MODEL = re.compile(r'\bRyzen\s*\d\s*(?:PRO\s*)?(\d)\d{3}', re.IGNORECASE)
+APPLE_MODEL = re.compile(r'\bM(\d)\b')
+GENERATION_LABEL = re.compile(r'\b(\d{1,2})\s*(?:e|è|ème|eme|th)\s*G[ée]n', re.IGNORECASE)
+
+OS_MAPPING = {
+    'macos': 'macOS',
+    'freedos': 'FreeDOS',
+    'free dos': 'FreeDOS',
+    'linux': 'Linux',
+    'ubuntu': 'Ubuntu',
+    'chromeos': 'ChromeOS'
+}
+
+PROCESSOR_MAPPING = {
+    'intel': 'Intel',
+    'amd': 'AMD',
+    'apple': 'Apple',
+    'qualcomm': 'Qualcomm',
+    'mediatek': 'Mediatek'
+}
+
+STORAGE_MEDIA = {
+    'ssd': 'SSD',
+    'nvme': 'SSD',
+    'pcie': 'SSD',
+    'm.2': 'SSD',
+    'hdd': 'HDD',
+    'emmc': 'eMMC'
+}
+
+def _to_float(value):
+    return float(value.replace(',', '.'))
+
+def normalize_ram(ram):
+    """'8 Go' -> 8.0 (GB)."""
+    if not isinstance(ram, str):
+        return None
+    match = NUMBER.search(ram)
+    return _to_float(match.group(1)) if match else None
+
+def normalize_storage(storage):
+    """'512 Go SSD' -> (512.0, 'SSD'); '1 TB HDD' -> (1024.0, 'HDD')."""
+    if not isinstance(storage, str):
+        return None, None
+    size_gb = None
+    match = STORAGE_SIZE.search(storage)
+    if match:
+        size_gb = _to_float(match.group(1))
+        if match.group(2).lower() in ('to', 'tb'):
+            size_gb *= 1024
+    medium = None
+    lowered = storage.lower()
+    for token, name in STORAGE_MEDIA.items():
+        if token in lowered:
+            medium = name
+            break
+    return size_gb, medium
+
+def normalize_screen(screen):
+    """'15.6"' -> 15.6 (inches); centimetre sizes are converted."""
+    if not isinstance(screen, str):
+        return None
+    match = NUMBER.search(screen)
+    if not match:
+        return None
+    size = _to_float(match.group(1))
+    if 'cm' in screen.lower():
+        size = round(size / 2.54, 1)
+    return size
+
+def normalize_os(os_name):
+    """'Windows 11 Pro' -> 'Windows 11'; 'FreeDos' -> 'FreeDOS'."""
+    if not isinstance(os_name, str) or not os_name.strip():
+        return None
+    lowered = os_name.strip().lower()
+    windows = re.match(r'windows\s*(\d+)?', lowered)
+    if windows:
+        return f"Windows {windows.group(1)}" if windows.group(1) else "Windows"
+    return OS_MAPPING.get(lowered, os_name.strip())
+
+def normalize_processor_brand(brand):
+    """' intel ' -> 'Intel'."""
+    if not isinstance(brand, str) or not brand.strip():
+        return None
+    lowered = brand.strip().lower()
+    return PROCESSOR_MAPPING.get(lowered, brand.strip())
+
+def processor_generation(*texts):
+    """Find the CPU generation in the processor field or the raw details.
+
+    Intel model numbers give the generation through their leading digits
+    (i5-1135G7 -> 11, i7-8550U -> 8), Ryzen through the first model digit,
+    Apple silicon through the M number. Labels such as "12ème Gén" are used
+    as a fallback.
+    """
+    for text in texts:
+        if not isinstance(text, str):
+            continue
+        match = INTEL_MODEL.search(text)
+        if match:
+            digits = match.group(1)
+            if len(digits) == 5 or digits.startswith('1'):
+                return int(digits[:2])
+            return int(digits[0])
+        match = RYZEN_MODEL.search(text) or APPLE_MODEL.search(text)
+        if match:
+            return int(match.group(1))
+    for text in texts:
+        if isinstance(text, str):
+            match = GENERATION_LABEL.search(text)
+            if match:
+                return int(match.group(1))
+    return None
+
+def parse_price(price):
+    """'1649' -> 1649.0; '1.649,000' -> 1649.0. Prices are kept as scraped text in the price column."""
+    if price is None:
+        return None
+    if isinstance(price, (int, float)):
+        return float(price)
+    text = str(price).strip()
+    if ',' in text:
+        text = text.replace('.', '').replace(',', '.')
+    try:
+        return float(text)
+    except ValueError:
+        return None
+
+def normalize_characteristics(characteristics, details=None):
+    """Turn the raw strings from extract_characteristics into canonical typed values."""
+    storage_gb, storage_medium = normalize_storage(characteristics.get('storage'))
+    return {
+        'ram_gb': normalize_ram(characteristics.get('ram')),
+        'storage_gb': storage_gb,
+        'storage_medium': storage_medium,
+        'screen_inches': normalize_screen(characteristics.get('screen')),
+        'os_name': normalize_os(characteristics.get('os')),
+        'cpu_brand': normalize_processor_brand(characteristics.get('processor brand')),
+        'cpu_generation': processor_generation(characteristics.get('processor'), details)
+    }
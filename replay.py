@@ -0,0 +1,307 @@
+import argparse
+import asyncio
+import csv
+import hashlib
+import html
+import json
+import logging
+import os
+import random
+import re
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+from config import URL, BASE_URL, REPLAY_DIR
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+INDEX_FILE = "index.json"
+DATA_FILE = "data-final.csv"
+EXTERNAL_PREFIX = "/_external/"
+
+SCRIPT_TAG = re.compile(r"<script\b[^>]*>.*?</script>", re.IGNORECASE | re.DOTALL)
+ABSOLUTE_SRC = re.compile(r'\b(src|srcset)="https?://([^"]+)"', re.IGNORECASE)
+
+def _path(url):
+    """Key a URL by its path (with ;params) and query, the same way the server looks requests up."""
+    parts = urlsplit(url)
+    return (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+
+def listing_url(url, page_number):
+    """The scraper's URL for listing page `page_number` (see scraper._scrape)."""
+    if page_number == 1:
+        return url
+    if ";pagenumber=" in url:
+        return re.sub(r";pagenumber=\d+", f";pagenumber={page_number}", url)
+    return f"{url};pagenumber={page_number}"
+
+def sanitize(page_html, base_url=BASE_URL):
+    """Make a rendered page self-contained for replay.
+
+    Scripts are removed, since the DOM is already rendered and they would call the
+    live site; links to `base_url` become relative; other absolute src URLs are
+    pointed at the stand-in server, keeping their file names (the scraper reads the
+    shop from the logo file name).
+    """
+    page_html = SCRIPT_TAG.sub("", page_html)
+    page_html = page_html.replace(f'"{base_url}/', '"/')
+    return ABSOLUTE_SRC.sub(lambda match: f'{match.group(1)}="{EXTERNAL_PREFIX}{match.group(2)}"', page_html)
+
+class SnapshotWriter:
+    """Store pages under `output` with an index of request path -> file."""
+
+    def __init__(self, output, url, base_url):
+        self.output = output
+        self.index = {"url": _path(url), "base_url": base_url, "pages": 0, "products": 0, "files": {}}
+        os.makedirs(output, exist_ok=True)
+
+    def add(self, url, body, kind):
+        path = _path(url)
+        name = f"{kind}-{hashlib.sha1(path.encode()).hexdigest()[:16]}.html"
+        with open(os.path.join(self.output, name), "w", encoding="utf-8") as file:
+            file.write(body)
+        if path not in self.index["files"]:
+            self.index["pages" if kind == "listing" else "products"] += 1
+        self.index["files"][path] = name
+
+    def save(self):
+        with open(os.path.join(self.output, INDEX_FILE), "w", encoding="utf-8") as file:
+            json.dump(self.index, file, indent=2)
+        logger.info(f"Saved {self.index['pages']} listing and {self.index['products']} product pages to {self.output}")
+
+async def record(output=REPLAY_DIR, url=URL, base_url=BASE_URL, max_pages=2, max_products=None, scroll_delay=2):
+    """Capture rendered listing and product pages from the live site as HTML snapshots."""
+    from playwright.async_api import async_playwright
+
+    writer = SnapshotWriter(output, url, base_url)
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(headless=True)
+        context = await browser.new_context(viewport={"width": 1280, "height": 720})
+        page = await context.new_page()
+        for page_number in range(1, max_pages + 1):
+            current = listing_url(url, page_number)
+            await page.goto(current, timeout=120000)
+            await page.wait_for_load_state("networkidle")
+            for _ in range(7):
+                await page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
+                await asyncio.sleep(scroll_delay)
+            hrefs = [await el.get_attribute("href") for el in await page.query_selector_all("product-card > a")]
+            hrefs = [href for href in hrefs if href]
+            if not hrefs:
+                break
+            writer.add(current, sanitize(await page.content(), base_url), "listing")
+
+            for href in hrefs[:max_products]:
+                link = f"{base_url}/{href}"
+                product_page = await context.new_page()
+                try:
+                    await product_page.goto(link, timeout=60000)
+                    await product_page.wait_for_load_state("networkidle")
+                    writer.add(link, sanitize(await product_page.content(), base_url), "product")
+                except Exception as e:
+                    logger.warning(f"Could not record {link}: {e}")
+                finally:
+                    await product_page.close()
+        await browser.close()
+    writer.save()
+    return writer.index
+
+LISTING_TEMPLATE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>PC portables</title></head>
+<body><div class="products">
+{cards}
+</div></body></html>
+"""
+
+PRODUCT_TEMPLATE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>{name}</title></head>
+<body>
+<h1 class="ba-item-title">{name}</h1>
+<div class="price-container"><div class="current"><span>{price} DT</span></div></div>
+<img class="item-list-source-logo" src="/_external/images/logo-{shop}.jpg" alt="{shop}">
+<div class="row product-body-text">{details}</div>
+<div class="item-list-source-external-container"><a href="{company_link}">Voir l'offre</a></div>
+</body></html>
+"""
+
+def synthesize(output=REPLAY_DIR, data=DATA_FILE, per_page=24, max_pages=None, url=URL, base_url=BASE_URL):
+    """Build a stand-in site from a products export (data-final.csv) when no recording is at hand.
+
+    Pages carry only the markup the scraper's selectors read, so they measure the
+    scraper and the browser rather than the site's own front-end.
+    """
+    with open(data, newline="", encoding="utf-8") as file:
+        rows = list(csv.DictReader(file))
+    pages = [rows[i:i + per_page] for i in range(0, len(rows), per_page)][:max_pages]
+
+    writer = SnapshotWriter(output, url, base_url)
+    for page_number, page_rows in enumerate(pages, start=1):
+        cards = []
+        for row in page_rows:
+            href = _path(row["id"]).lstrip("/")
+            description = row["description"] or ""
+            name = row["model"] if row.get("model") not in (None, "", "NULL") else description[:80]
+            cards.append(f'<product-card><a href="{html.escape(href)}">{html.escape(name[:80])}</a></product-card>')
+            writer.add(f"{base_url}/{href}", PRODUCT_TEMPLATE.format(
+                name=html.escape(name),
+                price=html.escape(row["price"] or ""),
+                shop=html.escape(row["company"] or "inconnu"),
+                details=html.escape(description),
+                company_link=html.escape(row["company_path"] or "")
+            ), "product")
+        writer.add(listing_url(url, page_number), LISTING_TEMPLATE.format(cards="\n".join(cards)), "listing")
+    writer.save()
+    return writer.index
+
+class ReplayServer:
+    """Serve snapshots from `snapshot_dir` over HTTP, with injected latency and errors.
+
+    latency/jitter: seconds added to every page response (latency + uniform(0, jitter)).
+    error_rate: share of requests matching `error_pattern` that fail, either with a
+    503 (error_mode="status") or by closing the connection without a response
+    (error_mode="reset").
+    """
+
+    def __init__(self, snapshot_dir=REPLAY_DIR, host="127.0.0.1", port=0, latency=0.0, jitter=0.0,
+                 error_rate=0.0, error_pattern=r"/product/", error_mode="status", seed=None):
+        with open(os.path.join(snapshot_dir, INDEX_FILE), encoding="utf-8") as file:
+            self.index = json.load(file)
+        self.snapshot_dir = snapshot_dir
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_pattern = re.compile(error_pattern)
+        self.error_mode = error_mode
+        self.stats = {"requests": 0, "served": 0, "not_found": 0, "errors": 0}
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def url(self):
+        """Listing URL to give scraper.scrape."""
+        return f"{self.base_url}{self.index['url']}"
+
+    def _count(self, key):
+        with self._lock:
+            self.stats[key] += 1
+
+    def _should_fail(self, path):
+        if not self.error_rate or not self.error_pattern.search(path):
+            return False
+        with self._lock:
+            return self._random.random() < self.error_rate
+
+    def _delay(self):
+        with self._lock:
+            delay = self.latency + (self._random.uniform(0, self.jitter) if self.jitter else 0)
+        if delay:
+            time.sleep(delay)
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                server._count("requests")
+                if self.path.startswith(EXTERNAL_PREFIX):
+                    return self._send(404, b"")  # Images and other third-party assets are not replayed
+                server._delay()
+                if server._should_fail(self.path):
+                    server._count("errors")
+                    if server.error_mode == "reset":
+                        self.close_connection = True
+                        self.connection.shutdown(socket.SHUT_RDWR)
+                        return
+                    return self._send(503, b"Service Unavailable")
+                name = server.index["files"].get(self.path) or server.index["files"].get(self.path.split("?")[0])
+                if name is None:
+                    server._count("not_found")
+                    return self._send(404, b"Not Found")
+                with open(os.path.join(server.snapshot_dir, name), "rb") as file:
+                    body = file.read()
+                server._count("served")
+                self._send(200, body, "text/html; charset=utf-8")
+
+            def _send(self, status, body, content_type="text/plain"):
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                logger.debug(format % args)
+
+        return Handler
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name="replay-server", daemon=True)
+        self._thread.start()
+        logger.info(f"Replaying {self.snapshot_dir} at {self.url}")
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.stop()
+        return False
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Record barbechli.tn pages and replay them from a local server.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    record_parser = commands.add_parser("record", help="Capture live listing and product pages as HTML snapshots")
+    record_parser.add_argument("--output", default=REPLAY_DIR)
+    record_parser.add_argument("--pages", type=int, default=2, help="Listing pages to capture")
+    record_parser.add_argument("--products", type=int, help="Product pages to capture per listing page (default: all)")
+
+    synthesize_parser = commands.add_parser("synthesize", help="Generate a stand-in site from a products export")
+    synthesize_parser.add_argument("--output", default=REPLAY_DIR)
+    synthesize_parser.add_argument("--data", default=DATA_FILE)
+    synthesize_parser.add_argument("--per-page", type=int, default=24)
+    synthesize_parser.add_argument("--pages", type=int, help="Listing pages to generate (default: all rows)")
+
+    serve_parser = commands.add_parser("serve", help="Serve snapshots until interrupted")
+    serve_parser.add_argument("--snapshots", default=REPLAY_DIR)
+    serve_parser.add_argument("--port", type=int, default=8765)
+    serve_parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every page")
+    serve_parser.add_argument("--jitter", type=float, default=0.0, help="Extra random latency, up to this many seconds")
+    serve_parser.add_argument("--error-rate", type=float, default=0.0, help="Share of product pages that fail")
+    serve_parser.add_argument("--error-mode", choices=["status", "reset"], default="status")
+
+    args = parser.parse_args(argv)
+    if args.command == "record":
+        asyncio.run(record(args.output, max_pages=args.pages, max_products=args.products))
+    elif args.command == "synthesize":
+        synthesize(args.output, args.data, args.per_page, args.pages)
+    else:
+        with ReplayServer(args.snapshots, port=args.port, latency=args.latency, jitter=args.jitter,
+                          error_rate=args.error_rate, error_mode=args.error_mode) as server:
+            print(f"Serving {server.url} (Ctrl+C to stop)")
+            try:
+                while True:
+                    time.sleep(3600)
+            except KeyboardInterrupt:
+                pass
+    return 0
+
+if __name__ == "__main__":
+    main()
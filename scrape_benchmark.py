@@ -0,0 +1,185 @@
+import argparse
+import asyncio
+import json
+import os
+import resource
+import sys
+import threading
+import time
+from config import REPLAY_DIR
+from replay import ReplayServer, synthesize, INDEX_FILE
+from scraper import scrape
+
+BASELINE_FILE = "scrape_benchmark_baseline.json"
+
+def _children_rss_mb(pid):
+    """Resident memory of every descendant of `pid` (the browser processes), from /proc; None elsewhere."""
+    if not os.path.isdir("/proc"):
+        return None
+    parents = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat", encoding="utf-8") as file:
+                fields = file.read().rsplit(")", 1)[1].split()
+        except OSError:
+            continue  # Exited while scanning
+        parents[int(entry)] = (int(fields[1]), int(fields[21]))  # ppid, rss in pages
+
+    descendants, frontier = set(), {pid}
+    while frontier:
+        frontier = {child for child, (parent, _) in parents.items() if parent in frontier} - descendants
+        descendants |= frontier
+    return sum(parents[child][1] for child in descendants) * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+
+class MemorySampler:
+    """Track the peak memory of the browser processes started during a run."""
+
+    def __init__(self, interval=0.2):
+        self.interval = interval
+        self.peak_mb = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.is_set():
+            rss = _children_rss_mb(os.getpid())
+            if rss is not None:
+                self.peak_mb = max(self.peak_mb or 0.0, rss)
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        self._stop.set()
+        self._thread.join()
+        return False
+
+def run_scrape(snapshot_dir, concurrency, latency=0.0, jitter=0.0, error_rate=0.0, error_mode="status", seed=0):
+    """Scrape the replayed site once and report throughput, memory and how injected errors were absorbed."""
+    products = []
+    with ReplayServer(snapshot_dir, latency=latency, jitter=jitter, error_rate=error_rate,
+                      error_mode=error_mode, seed=seed) as server:
+        with MemorySampler() as memory:
+            start = time.perf_counter()
+            summary = asyncio.run(scrape(
+                url=server.url, base_url=server.base_url, max_pages=server.index["pages"],
+                scroll_delay=0, page_delay=0, concurrency=concurrency, sink=products.append
+            ))
+            elapsed = time.perf_counter() - start
+        stats = dict(server.stats)
+
+    expected = server.index["products"]
+    return {
+        "concurrency": concurrency,
+        "seconds": round(elapsed, 2),
+        "products": len(products),
+        "products_per_sec": round(len(products) / elapsed, 2) if elapsed else None,
+        "pages": summary["pages"],
+        "peak_browser_memory_mb": round(memory.peak_mb, 1) if memory.peak_mb is not None else None,
+        "python_max_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "errors_injected": stats["errors"],
+        "errors_seen": summary["error"],
+        "skipped": summary["skipped"],
+        "lost": expected - len(products) - summary["skipped"]
+    }
+
+def add_worker_memory(results):
+    """Set memory_per_added_worker_mb: peak browser memory above the lowest-concurrency run, per extra worker.
+
+    The browser itself costs the same at any concurrency, so only the growth
+    between runs reflects what each additional open product page costs.
+    """
+    reference = min(results, key=lambda result: result["concurrency"])
+    for result in results:
+        extra_workers = result["concurrency"] - reference["concurrency"]
+        if extra_workers and result["peak_browser_memory_mb"] is not None \
+                and reference["peak_browser_memory_mb"] is not None:
+            growth = result["peak_browser_memory_mb"] - reference["peak_browser_memory_mb"]
+            result["memory_per_added_worker_mb"] = round(growth / extra_workers, 1)
+        else:
+            result["memory_per_added_worker_mb"] = None
+
+def compare(report, baseline, max_slowdown):
+    """Return throughput regressions of `report` against `baseline`, per concurrency level."""
+    reference = {str(result["concurrency"]): result for result in baseline.get("results", [])}
+    failures = []
+    for result in report["results"]:
+        previous = reference.get(str(result["concurrency"]))
+        if previous and previous["products_per_sec"] and result["products_per_sec"] is not None:
+            floor = previous["products_per_sec"] * (1 - max_slowdown)
+            if result["products_per_sec"] < floor:
+                failures.append(
+                    f"concurrency {result['concurrency']}: {result['products_per_sec']} products/sec < {floor:.2f} "
+                    f"(baseline {previous['products_per_sec']})"
+                )
+    return failures
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark scraper.scrape() against a replayed copy of the site.")
+    parser.add_argument("--snapshots", default=REPLAY_DIR, help="Directory written by replay.py record/synthesize")
+    parser.add_argument("--synthesize-pages", type=int, default=3,
+                        help="Listing pages to generate from data-final.csv when --snapshots has no index")
+    parser.add_argument("--concurrency", nargs="+", type=int, default=[1, 2, 4, 8])
+    parser.add_argument("--latency", type=float, default=0.05, help="Seconds added to every page")
+    parser.add_argument("--jitter", type=float, default=0.05, help="Extra random latency, up to this many seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of product pages that fail")
+    parser.add_argument("--error-mode", choices=["status", "reset"], default="status")
+    parser.add_argument("--baseline", default=BASELINE_FILE)
+    parser.add_argument("--record", action="store_true", help="Write this run as the new baseline")
+    parser.add_argument("--max-slowdown", type=float, default=0.2, help="Allowed throughput drop (fraction)")
+    parser.add_argument("--output", help="Also write the JSON report here")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(os.path.join(args.snapshots, INDEX_FILE)):
+        synthesize(args.snapshots, max_pages=args.synthesize_pages)
+
+    settings = {key: getattr(args, key) for key in ("latency", "jitter", "error_rate", "error_mode")}
+    report = {"settings": settings, "results": []}
+    empty = []
+    for concurrency in args.concurrency:
+        result = run_scrape(args.snapshots, concurrency, **settings)
+        report["results"].append(result)
+        if result["products"] == 0 or result["pages"] == 0:
+            empty.append(concurrency)
+
+    add_worker_memory(report["results"])
+    for result in report["results"]:
+        print(f"concurrency {result['concurrency']:>3}: {result['products_per_sec']} products/sec, "
+              f"{result['peak_browser_memory_mb']} MB peak, {result['memory_per_added_worker_mb']} MB/added worker, "
+              f"{result['errors_seen']}/{result['errors_injected']} injected errors seen, {result['lost']} lost")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2)
+
+    if empty:
+        # scrape() logs and swallows browser failures, so an empty run means the benchmark did not run
+        print(f"FAILED concurrency {', '.join(map(str, empty))}: no pages or products scraped; check the log above")
+        return 1
+
+    if args.record:
+        with open(args.baseline, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2)
+        print(f"Baseline recorded in {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; run with --record to create one")
+        return 0
+
+    with open(args.baseline, encoding="utf-8") as file:
+        baseline = json.load(file)
+    if baseline.get("settings") != settings:
+        print(f"Baseline in {args.baseline} used other settings ({baseline.get('settings')}); not comparing")
+        return 0
+    failures = compare(report, baseline, args.max_slowdown)
+    for failure in failures:
+        print(f"REGRESSION {failure}")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
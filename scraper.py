@@ -1,18 +1,50 @@
-from playwright.async_api import async_playwright  
+from playwright.async_api import async_playwright
 import unicodedata
 import re
 import asyncio
-from storage import save_to_csv_single
-from config import URL, CSV_FILENAME
-from database import store_product_in_db  
+from contextlib import ExitStack
+from functools import partial
+from storage import BatchWriter
+from config import URL, BASE_URL, CSV_FILENAME, MAX_PAGES, SCROLL_DELAY, PAGE_SETTLE_DELAY, SCRAPE_CONCURRENCY
+from database import store_product_in_db
+from metrics import PRODUCTS, profiled, timed
 import logging
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-async def scrape():
-    """Scrapes laptop data from the website asynchronously, handling pagination."""
+async def scrape(profile=False, url=URL, base_url=BASE_URL, max_pages=MAX_PAGES, scroll_delay=SCROLL_DELAY,
+                 page_delay=PAGE_SETTLE_DELAY, concurrency=SCRAPE_CONCURRENCY, sink=None):
+    """Scrapes laptop data from the website asynchronously, handling pagination.
+
+    Every scraped product is passed to `sink`; by default it is stored in the
+    database and archived in CSV_FILENAME. A sink may return the product's
+    outcome ("stored", "duplicate" or "failed"); None counts as stored. `url`/`base_url` point the scraper
+    at another copy of the site, such as a replay.ReplayServer. Up to
+    `concurrency` product pages are open at once. With profile=True the run is
+    profiled and the report written by metrics.profiled.
+
+    Returns a summary: listing pages visited and products by outcome.
+    """
+    with ExitStack() as stack:
+        if sink is None:
+            # Local archive of everything scraped in this run, buffered instead of one open/close per row
+            sink = partial(_store, stack.enter_context(BatchWriter(CSV_FILENAME)))
+        stack.enter_context(timed("scrape"))
+        if profile:
+            stack.enter_context(profiled("scrape"))
+        return await _scrape(sink, url, base_url, max_pages, scroll_delay, page_delay, concurrency)
+
+def _store(writer, product):
+    outcome = store_product_in_db(product)
+    with timed("csv_write"):
+        writer.write(product)
+    return outcome
+
+async def _scrape(sink, url, base_url, max_pages, scroll_delay, page_delay, concurrency):
+    summary = {"pages": 0, "stored": 0, "duplicate": 0, "failed": 0, "skipped": 0, "error": 0}
+    semaphore = asyncio.Semaphore(max(concurrency, 1))
     async with async_playwright() as p:
         try:
             browser = await p.chromium.launch(headless=True)
@@ -21,29 +53,31 @@ async def scrape():
                 user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
             )
             page = await context.new_page()
-            await page.goto(URL, timeout=120000)
-            await page.wait_for_load_state("networkidle")
+            with timed("listing_load"):
+                await page.goto(url, timeout=120000)
+                await page.wait_for_load_state("networkidle")
 
             page_number = 1
-            max_pages = 96  # From your HTML; adjust if needed
 
             while page_number <= max_pages:
                 logger.info(f"Scraping page {page_number}...")
 
                 # Scroll to load all products
-                for _ in range(7):
-                    await page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
-                    await asyncio.sleep(2)
+                with timed("scroll"):
+                    for _ in range(7):
+                        await page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
+                        await asyncio.sleep(scroll_delay)
 
                 # Get product links
                 product_selector = "product-card > a"
                 try:
-                    await page.wait_for_selector(product_selector, timeout=60000)
-                    product_links = [
-                        f"https://barbechli.tn/{await el.get_attribute('href')}"
-                        for el in await page.query_selector_all(product_selector) 
-                        if await el.get_attribute("href")
-                    ]
+                    with timed("product_links"):
+                        await page.wait_for_selector(product_selector, timeout=60000)
+                        product_links = [
+                            f"{base_url}/{await el.get_attribute('href')}"
+                            for el in await page.query_selector_all(product_selector)
+                            if await el.get_attribute("href")
+                        ]
                     logger.info(f"Found {len(product_links)} products on page {page_number}")
                 except Exception as e:
                     logger.warning(f"Failed to find products on page {page_number}: {e}")
@@ -53,67 +87,29 @@ async def scrape():
                 if len(product_links) == 0:
                     logger.info("No products found on this page. Stopping.")
                     break
+                summary["pages"] += 1
 
-                # Extract product details for this page
-                for idx, link in enumerate(product_links):
-                    try:
-                        product_page = await context.new_page()
-                        await product_page.goto(link, timeout=60000)
-                        await product_page.wait_for_load_state("networkidle")
-
-                        name_element = await product_page.query_selector(".ba-item-title")
-                        name = await name_element.inner_text() if name_element else "N/A"
-
-                        if unicodedata.normalize('NFD', name).encode('ascii', 'ignore').decode('ascii').lower().startswith("ecran"):
-                            logger.info(f"Skipping {idx+1} on page {page_number}: {name}")
-                            await product_page.close()
-                            continue
-
-                        price_element = await product_page.query_selector(".price-container .current span:first-child")
-                        raw_price = await price_element.inner_text() if price_element else "N/A"
-                        price = re.sub(r"[^\d.,]", "", raw_price).strip() if raw_price != "N/A" else "N/A"
-
-                        img_element = await product_page.query_selector("img.item-list-source-logo")
-                        img_url = await img_element.get_attribute("src") if img_element else "N/A"
-
-                        shopName = "N/A"
-                        if img_url and "logo-" in img_url:
-                            match = re.search(r"logo-(.*?)\.jpg", img_url)
-                            shopName = match.group(1) if match else "N/A"
-
-                        details_element = await product_page.query_selector("div.row.product-body-text")
-                        details = await details_element.inner_text() if details_element else "N/A"
-
-                        company_link_element = await product_page.query_selector(".item-list-source-external-container a")
-                        company_link = await company_link_element.get_attribute("href") if company_link_element else "N/A"
-
-                        product = {
-                            "name": name, 
-                            "price": price, 
-                            "link": link, 
-                            "shop": shopName, 
-                            "details": details, 
-                            "companyLink": company_link
-                        }
-
-                        store_product_in_db(product)
-                        logger.info(f"Scraped and stored product {idx+1} on page {page_number}: {name}")
-                        await product_page.close()
-                    except Exception as e:
-                        logger.error(f"Error scraping product {idx+1} on page {page_number} at {link}: {e}")
+                # Extract product details for this page, at most `concurrency` product pages at a time
+                outcomes = await asyncio.gather(*(
+                    _scrape_product(context, semaphore, sink, link, idx, page_number)
+                    for idx, link in enumerate(product_links)
+                ))
+                for outcome in outcomes:
+                    summary[outcome] += 1
 
                 # Navigate to the next page via URL
                 next_page_num = page_number + 1
-                if ";pagenumber=" in URL:
-                    next_url = re.sub(r";pagenumber=\d+", f";pagenumber={next_page_num}", URL)
+                if ";pagenumber=" in url:
+                    next_url = re.sub(r";pagenumber=\d+", f";pagenumber={next_page_num}", url)
                 else:
-                    next_url = f"{URL};pagenumber={next_page_num}"
-                
+                    next_url = f"{url};pagenumber={next_page_num}"
+
                 logger.info(f"Navigating to: {next_url}")
                 try:
-                    await page.goto(next_url, timeout=60000)
-                    await page.wait_for_load_state("networkidle", timeout=60000)
-                    await asyncio.sleep(3)  # Ensure page fully loads
+                    with timed("listing_load"):
+                        await page.goto(next_url, timeout=60000)
+                        await page.wait_for_load_state("networkidle", timeout=60000)
+                        await asyncio.sleep(page_delay)  # Ensure page fully loads
                     page_number += 1
                 except Exception as e:
                     logger.warning(f"Navigation to page {next_page_num} failed: {e}. Stopping.")
@@ -122,3 +118,63 @@ async def scrape():
             await browser.close()
         except Exception as e:
             logger.error(f"Error during scraping process: {e}")
+    return summary
+
+async def _scrape_product(context, semaphore, sink, link, idx, page_number):
+    """Scrape one product page and pass the product to `sink`; returns the outcome."""
+    async with semaphore:
+        product_page = None
+        try:
+            with timed("product_page_load"):
+                product_page = await context.new_page()
+                response = await product_page.goto(link, timeout=60000)
+                if response is not None and not response.ok:
+                    raise RuntimeError(f"HTTP {response.status}")
+                await product_page.wait_for_load_state("networkidle")
+
+            name_element = await product_page.query_selector(".ba-item-title")
+            name = await name_element.inner_text() if name_element else "N/A"
+
+            if unicodedata.normalize('NFD', name).encode('ascii', 'ignore').decode('ascii').lower().startswith("ecran"):
+                logger.info(f"Skipping {idx+1} on page {page_number}: {name}")
+                PRODUCTS.inc(outcome="skipped")
+                return "skipped"
+
+            with timed("field_extraction"):
+                price_element = await product_page.query_selector(".price-container .current span:first-child")
+                raw_price = await price_element.inner_text() if price_element else "N/A"
+                price = re.sub(r"[^\d.,]", "", raw_price).strip() if raw_price != "N/A" else "N/A"
+
+                img_element = await product_page.query_selector("img.item-list-source-logo")
+                img_url = await img_element.get_attribute("src") if img_element else "N/A"
+
+                shopName = "N/A"
+                if img_url and "logo-" in img_url:
+                    match = re.search(r"logo-(.*?)\.jpg", img_url)
+                    shopName = match.group(1) if match else "N/A"
+
+                details_element = await product_page.query_selector("div.row.product-body-text")
+                details = await details_element.inner_text() if details_element else "N/A"
+
+                company_link_element = await product_page.query_selector(".item-list-source-external-container a")
+                company_link = await company_link_element.get_attribute("href") if company_link_element else "N/A"
+
+            product = {
+                "name": name,
+                "price": price,
+                "link": link,
+                "shop": shopName,
+                "details": details,
+                "companyLink": company_link
+            }
+
+            outcome = sink(product) or "stored"
+            logger.info(f"Scraped product {idx+1} on page {page_number} ({outcome}): {name}")
+            return outcome
+        except Exception as e:
+            PRODUCTS.inc(outcome="error")
+            logger.error(f"Error scraping product {idx+1} on page {page_number} at {link}: {e}")
+            return "error"
+        finally:
+            if product_page is not None:
+                await product_page.close()
@@ -1,18 +1,255 @@
 import csv
-import pandas as pd
+import heapq
+import hashlib
+import os
+import tempfile
+import time
+from datetime import date, datetime
+
+FIELDNAMES = ["name", "price", "link", "shop", "details", "companyLink"]
+
+# Row hashes clean_csv keeps in memory before spilling to an external sort
+DEDUP_MAX_KEYS = 1000000
 
 def save_to_csv_single(product, idx, filename):
-    """Append a product entry to a CSV file."""
+    """Append a product entry to a CSV file (one open/close per row; prefer BatchWriter for a whole run)."""
     with open(filename, mode="a", newline="", encoding="utf-8") as file:
-        writer = csv.DictWriter(file, fieldnames=["name", "price", "link", "shop", "details","companyLink"])
+        writer = csv.DictWriter(file, fieldnames=FIELDNAMES)
         if file.tell() == 0:  # Write headers if file is empty
             writer.writeheader()
         writer.writerow(product)
     print(f"Saved {idx+1}: {product['name']} - {product['price']}")
 
-def clean_csv(filename):
-    """Remove duplicate rows from CSV."""
-    df = pd.read_csv(filename)
-    df_cleaned = df.drop_duplicates()
-    df_cleaned.to_csv(filename, index=False)
-    print(f"Cleaned dataset saved as {filename}")
+def _row_digest(row, indexes):
+    """16-byte hash of the whole row, or of the key columns when `indexes` is given."""
+    values = row if indexes is None else [row[i] if i < len(row) else "" for i in indexes]
+    return hashlib.blake2b("\x1f".join(values).encode("utf-8"), digest_size=16).digest()
+
+def _external_sort(lines, run_size, tmpdir):
+    """Sort newline-terminated strings using sorted runs on disk once more than `run_size` are buffered."""
+    buffer, runs = [], []
+    try:
+        for line in lines:
+            buffer.append(line)
+            if len(buffer) >= run_size:
+                runs.append(_write_run(buffer, tmpdir))
+                buffer = []
+        if not runs:
+            yield from sorted(buffer)
+            return
+        if buffer:
+            runs.append(_write_run(buffer, tmpdir))
+            buffer = []
+        files = [open(run, encoding="utf-8") for run in runs]
+        try:
+            yield from heapq.merge(*files)
+        finally:
+            for file in files:
+                file.close()
+    finally:
+        for run in runs:
+            os.remove(run)
+
+def _write_run(buffer, tmpdir):
+    buffer.sort()
+    fd, path = tempfile.mkstemp(dir=tmpdir, suffix=".run")
+    with os.fdopen(fd, "w", encoding="utf-8") as file:
+        file.writelines(buffer)
+    return path
+
+def _dedup_in_memory(filename, tmp_path, keys, max_keys):
+    """Single pass keeping a set of row hashes; returns None if the set outgrows `max_keys`."""
+    seen = set()
+    removed = 0
+    with open(filename, newline="", encoding="utf-8") as source, \
+            open(tmp_path, "w", newline="", encoding="utf-8") as target:
+        reader = csv.reader(source)
+        writer = csv.writer(target)
+        header = next(reader, None)
+        if header is None:
+            return 0
+        writer.writerow(header)
+        indexes = _key_indexes(header, keys)
+        for row in reader:
+            digest = _row_digest(row, indexes)
+            if digest in seen:
+                removed += 1
+                continue
+            if len(seen) >= max_keys:
+                return None
+            seen.add(digest)
+            writer.writerow(row)
+    return removed
+
+def _dedup_external(filename, tmp_path, keys, max_keys):
+    """Two passes with external sorts: find the first occurrence of each hash, then copy those rows in order."""
+    tmpdir = os.path.dirname(os.path.abspath(tmp_path))
+
+    def hashed_rows():
+        with open(filename, newline="", encoding="utf-8") as source:
+            reader = csv.reader(source)
+            indexes = _key_indexes(next(reader), keys)
+            for seq, row in enumerate(reader):
+                yield f"{_row_digest(row, indexes).hex()}\t{seq:012d}\n"
+
+    def first_occurrences():
+        previous = None
+        for line in _external_sort(hashed_rows(), max_keys, tmpdir):
+            digest, seq = line.rstrip("\n").split("\t")
+            if digest != previous:
+                previous = digest
+                yield f"{seq}\n"
+
+    kept = (int(line) for line in _external_sort(first_occurrences(), max_keys, tmpdir))
+    next_kept = next(kept, None)
+    total = written = 0
+    with open(filename, newline="", encoding="utf-8") as source, \
+            open(tmp_path, "w", newline="", encoding="utf-8") as target:
+        reader = csv.reader(source)
+        writer = csv.writer(target)
+        writer.writerow(next(reader))
+        for seq, row in enumerate(reader):
+            total += 1
+            if seq == next_kept:
+                writer.writerow(row)
+                written += 1
+                next_kept = next(kept, None)
+    return total - written
+
+def _key_indexes(header, keys):
+    if not keys:
+        return None
+    names = [name.strip() for name in header]
+    return [names.index(key) for key in keys]
+
+def clean_csv(filename, keys=None, max_keys=DEDUP_MAX_KEYS):
+    """Remove duplicate rows from CSV without loading it into memory.
+
+    Rows are compared by a hash of all fields, or only of the `keys` columns
+    (e.g. ["link"] or ["companyLink"]); the first occurrence is kept. Hashes are
+    held in memory up to `max_keys`, after which the file is deduplicated with a
+    disk-backed external sort instead. The result replaces `filename` atomically.
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(filename)), suffix=".tmp")
+    os.close(fd)
+    try:
+        removed = _dedup_in_memory(filename, tmp_path, keys, max_keys)
+        if removed is None:
+            print(f"More than {max_keys} distinct rows, switching to external sort")
+            removed = _dedup_external(filename, tmp_path, keys, max_keys)
+        os.replace(tmp_path, filename)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    print(f"Cleaned dataset saved as {filename} ({removed} duplicates removed)")
+
+class BatchWriter:
+    """Buffered writer for scraped products.
+
+    Keeps the output file open, buffers rows and flushes every `flush_rows` rows
+    or once `flush_interval` seconds have passed since the last flush (checked on
+    write). The live file is always `filename`; when it has grown past
+    `max_bytes` or was started on an earlier day (`rotate_daily`), it is renamed
+    with a timestamp suffix before the next rows are written. Files are opened
+    on the first flush with rows, so no empty file is left behind. `fmt` is
+    "csv" or "parquet" and is inferred from the file extension by default. Use
+    as a context manager, or call close().
+    """
+
+    def __init__(self, filename, fieldnames=FIELDNAMES, fmt=None, flush_rows=500, flush_interval=5.0,
+                 max_bytes=None, rotate_daily=False):
+        self.filename = filename
+        self.fieldnames = fieldnames
+        self.fmt = fmt or ("parquet" if filename.endswith(".parquet") else "csv")
+        self.flush_rows = flush_rows
+        self.flush_interval = flush_interval
+        self.max_bytes = max_bytes
+        self.rotate_daily = rotate_daily
+        self.rows_written = 0
+        self._buffer = []
+        self._file = None
+        self._writer = None
+        self._opened_on = None
+        self._last_flush = time.monotonic()
+
+    def _open(self):
+        if os.path.exists(self.filename) and os.path.getsize(self.filename) > 0:
+            # A closed Parquet file cannot be appended to; a CSV left by an earlier run is archived
+            # first if it is already due, e.g. last written on an earlier day with rotate_daily
+            last_written_on = date.fromtimestamp(os.path.getmtime(self.filename))
+            if self.fmt == "parquet" or self._should_rotate(last_written_on):
+                self._rotate()
+        self._opened_on = date.today()
+        if self.fmt == "parquet":
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            self._schema = pa.schema([(name, pa.string()) for name in self.fieldnames])
+            self._writer = pq.ParquetWriter(self.filename, self._schema)
+        else:
+            self._file = open(self.filename, mode="a", newline="", encoding="utf-8")
+            self._writer = csv.DictWriter(self._file, fieldnames=self.fieldnames, extrasaction="ignore")
+            if self._file.tell() == 0:  # Write headers if file is empty
+                self._writer.writeheader()
+
+    def _close_file(self):
+        if self.fmt == "parquet":
+            if self._writer is not None:
+                self._writer.close()
+        elif self._file is not None:
+            self._file.close()
+        self._file = None
+        self._writer = None
+
+    def _rotate(self):
+        root, ext = os.path.splitext(self.filename)
+        archived = f"{root}.{datetime.now():%Y%m%d-%H%M%S-%f}{ext}"
+        os.replace(self.filename, archived)
+        return archived
+
+    def _should_rotate(self, started_on):
+        if self.rotate_daily and date.today() != started_on:
+            return True
+        return bool(self.max_bytes) and os.path.getsize(self.filename) >= self.max_bytes
+
+    def write(self, product):
+        """Buffer one product; flushes when the row or time threshold is reached."""
+        self._buffer.append(product)
+        if len(self._buffer) >= self.flush_rows or time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self, rotate=True):
+        """Rotate the file if it is due (and `rotate` is set), then write buffered rows to disk."""
+        if rotate and self._writer is not None and self._should_rotate(self._opened_on):
+            self._close_file()
+            self._rotate()
+        if self._buffer:
+            if self._writer is None:
+                self._open()
+            if self.fmt == "parquet":
+                import pyarrow as pa
+
+                columns = {
+                    name: [None if row.get(name) is None else str(row.get(name)) for row in self._buffer]
+                    for name in self.fieldnames
+                }
+                self._writer.write_table(pa.Table.from_pydict(columns, schema=self._schema))
+            else:
+                self._writer.writerows(self._buffer)
+                self._file.flush()
+            self.rows_written += len(self._buffer)
+            self._buffer = []
+        self._last_flush = time.monotonic()
+
+    def close(self):
+        """Flush remaining rows and close the current file."""
+        # No rotation here: the rows go to the current file, which the next run rotates if it is due
+        self.flush(rotate=False)
+        self._close_file()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()